@@ -9,6 +9,13 @@ class EolTimifyConfig(AppConfig):
     name = 'eoltimify'
 
     plugin_app = {
+        PluginURLs.CONFIG: {
+            ProjectType.LMS: {
+                PluginURLs.NAMESPACE: 'eoltimify',
+                PluginURLs.REGEX: r'^eoltimify/',
+                PluginURLs.RELATIVE_PATH: 'urls',
+            }
+        },
         PluginSettings.CONFIG: {
             ProjectType.CMS: {
                 SettingsType.COMMON: {
@@ -17,8 +24,10 @@ class EolTimifyConfig(AppConfig):
             ProjectType.LMS: {
                 SettingsType.COMMON: {
                     PluginSettings.RELATIVE_PATH: 'settings.common'},
+                SettingsType.PRODUCTION: {
+                    PluginSettings.RELATIVE_PATH: 'settings.production'},
             },
         }}
 
     def ready(self):
-        pass
+        from . import tasks  # pylint: disable=unused-import
@@ -0,0 +1,107 @@
+"""
+Quilgo session token shared by all courses and workers
+"""
+import json
+import time
+import threading
+import logging
+
+from django.conf import settings as DJANGO_SETTINGS
+
+from . import metrics
+from .client import get_client, QuilgoError
+from .utils import cache_single_flight
+
+log = logging.getLogger(__name__)
+
+TOKEN_CACHE_KEY = "eol_timify-apikey"
+TOKEN_LOCK_KEY = TOKEN_CACHE_KEY + "-lock"
+
+# In-process copy of the cached token: [connectsid, api_token, expires_at]
+_memo = {'data': None}
+_memo_lock = threading.Lock()
+
+
+def _memo_get():
+    data = _memo['data']
+    if data is not None and data[2] > time.time():
+        return data
+    return None
+
+
+def _memo_set(data):
+    with _memo_lock:
+        _memo['data'] = data
+
+
+def reset_api_token():
+    """
+        Discard the in-process token, the django cache entry is kept
+    """
+    _memo_set(None)
+
+
+def _login(user_id):
+    """
+        Login in quilgo.com with TIMIFY_USER/TIMIFY_PASSWORD,
+        return [connectsid, api_token, expires_at] or None
+    """
+    if DJANGO_SETTINGS.TIMIFY_USER == "" or DJANGO_SETTINGS.TIMIFY_PASSWORD == "":
+        log.error("TIMIFY_USER or TIMIFY_PASSWORD not configured, user_id: {}".format(user_id))
+        return None
+    connectsid = ""
+    parameters = {
+        "username": DJANGO_SETTINGS.TIMIFY_USER,
+        "password": DJANGO_SETTINGS.TIMIFY_PASSWORD}
+    try:
+        result = get_client().post(
+            "auth/ep",
+            data=json.dumps(parameters),
+            idempotent=True)
+    except QuilgoError as e:
+        log.error("Error to get connect.sid, user_id: {}, error: {}".format(user_id, e))
+        return None
+    if result.status_code != 200:
+        log.error("Error to get connect.sid, user_id: {}, response: {}".format(user_id, result.content))
+        return None
+    headers = result.headers["Set-Cookie"].split(";")
+    for header in headers:
+        if "connect.sid" in header:
+            aux_id = header.split("=")
+            connectsid = aux_id[2]
+
+    try:
+        result_api = get_client().get(
+            "~/Session",
+            connectsid=connectsid)
+    except QuilgoError as e:
+        log.error("Error to get api-key, user_id: {}, error: {}".format(user_id, e))
+        return None
+    if result_api.status_code != 200:
+        log.error("Error to get api-key, user_id: {}, response: {}".format(user_id, result_api.content))
+        return None
+    data = json.loads(result_api.text)
+    expires_at = time.time() + DJANGO_SETTINGS.EOL_TIMIFY_TIME_CACHE
+    return [connectsid, data["session"]["api_token"], expires_at]
+
+
+def get_api_token(user_id=None):
+    """
+        Return connect.sid and api-key to access quilgo.com api, (False, False) on error.
+        Only one worker at a time logs in, the others wait for its result.
+    """
+    data = _memo_get()
+    if data is None:
+        data = cache_single_flight(
+            TOKEN_CACHE_KEY,
+            lambda: _login(user_id),
+            DJANGO_SETTINGS.EOL_TIMIFY_TIME_CACHE,
+            DJANGO_SETTINGS.EOL_TIMIFY_TOKEN_LOCK_TIMEOUT,
+            DJANGO_SETTINGS.EOL_TIMIFY_TOKEN_WAIT,
+            metric="cache.token")
+        if data is None:
+            return False, False
+        _memo_set(data)
+    else:
+        metrics.incr("cache.token.hit")
+    return data[0], data[1]
@@ -0,0 +1,177 @@
+"""
+Benchmark of the student view, student_status and show_score against a local fake quilgo api
+
+    EOL_TIMIFY_BENCHMARK=1 pytest benchmark.py -s
+
+EOL_TIMIFY_BENCHMARK_SIZES (100,1000,10000,50000), EOL_TIMIFY_BENCHMARK_LATENCY
+(seconds by call, 0.05), EOL_TIMIFY_BENCHMARK_ERROR_RATE (0) and EOL_TIMIFY_BENCHMARK_LINKS
+(links already in the form, 0) change the scenario.
+"""
+import json
+import os
+import time
+import unittest
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext, override_settings
+from mock import Mock, patch
+from xblock.field_data import DictFieldData
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+from student.tests.factories import UserFactory, CourseEnrollmentFactory
+
+from .auth import reset_api_token
+from .client import reset_client
+from .eoltimify import EolTimifyXBlock
+from .fake_quilgo import FakeQuilgoServer
+from .links import link_index_key
+from .metrics import reset_metrics
+
+
+def get_sizes():
+    return [int(size) for size in os.environ.get(
+        'EOL_TIMIFY_BENCHMARK_SIZES', '100,1000,10000,50000').split(',')]
+
+
+class TestRequest(object):
+    # pylint: disable=too-few-public-methods
+    """
+    Module helper for @json_handler
+    """
+    method = 'POST'
+    success = None
+
+    def __init__(self, data):
+        self.body = json.dumps(data).encode('utf-8')
+
+
+@unittest.skipUnless(os.environ.get('EOL_TIMIFY_BENCHMARK'), "set EOL_TIMIFY_BENCHMARK=1 to run the benchmark")
+class EolTimifyBenchmark(ModuleStoreTestCase):
+    """
+    Time and count the queries of the student view paths and show_score
+    """
+
+    def setUp(self):
+        super(EolTimifyBenchmark, self).setUp()
+        self.course = CourseFactory.create(org='foo', course='bench', run='bar')
+        self.server = FakeQuilgoServer(
+            latency=float(os.environ.get('EOL_TIMIFY_BENCHMARK_LATENCY', '0.05')),
+            error_rate=float(os.environ.get('EOL_TIMIFY_BENCHMARK_ERROR_RATE', '0')),
+            link_count=int(os.environ.get('EOL_TIMIFY_BENCHMARK_LINKS', '0'))).start()
+        self.addCleanup(self.server.stop)
+        self.override = override_settings(
+            TIMIFY_USER="bench",
+            TIMIFY_PASSWORD="bench",
+            EOL_TIMIFY_API_URL=self.server.url,
+            EOL_TIMIFY_RATE_LIMITS={},
+            EOL_TIMIFY_RETRY_BACKOFF=0.05,
+            CELERY_ALWAYS_EAGER=True)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+        self.results = []
+
+    def reset(self):
+        reset_client()
+        reset_api_token()
+        reset_metrics()
+        cache.clear()
+
+    def make_xblock(self, user_id, staff=False):
+        runtime = Mock(
+            course_id=self.course.id,
+            user_is_staff=staff,
+            service=Mock(return_value=Mock(_catalog={})))
+        xblock = EolTimifyXBlock(runtime, DictFieldData({'idform': '11223344'}), Mock(user_id=user_id))
+        xblock.xmodule_runtime = runtime
+        xblock.location = self.course.location
+        xblock.course_id = self.course.id
+        xblock.category = 'eoltimify'
+        return xblock
+
+    def measure(self, name, size, function):
+        """
+            Run function and save its time and number of queries
+        """
+        with CaptureQueriesContext(connection) as queries:
+            calls = self.server.calls
+            start = time.time()
+            function()
+            elapsed = time.time() - start
+        self.results.append((name, size, elapsed * 1000, len(queries), self.server.calls - calls))
+
+    def report(self):
+        lines = ["", "{:<28} {:>8} {:>12} {:>8} {:>8}".format("case", "students", "ms", "queries", "quilgo")]
+        for name, size, ms, queries, calls in self.results:
+            lines.append("{:<28} {:>8} {:>12.1f} {:>8} {:>8}".format(name, size, ms, queries, calls))
+        print("\n".join(lines))
+
+    def enroll(self, size):
+        """
+            Enroll 'size' students with a finished link in the fake api, return the users
+        """
+        from django.contrib.auth.models import User
+        from student.models import CourseEnrollment
+        from .models import EolTimifyLink
+        last_id = User.objects.aggregate(Max('id'))['id__max'] or 0
+        User.objects.bulk_create([
+            User(username="bench{}".format(last_id + i), email="bench{}@example.com".format(last_id + i))
+            for i in range(size)], batch_size=1000)
+        users = list(User.objects.filter(id__gt=last_id).order_by('id'))
+        CourseEnrollment.objects.bulk_create([
+            CourseEnrollment(user=user, course_id=self.course.id, is_active=True, mode='audit')
+            for user in users], batch_size=1000)
+        links = self.server.create_links("11223344", [user.username for user in users], finished=True)
+        EolTimifyLink.objects.bulk_create([
+            EolTimifyLink(
+                course_id=self.course.id,
+                usage_key=self.course.location,
+                user=user,
+                id_form="11223344",
+                id_link=str(link['id']),
+                hash=link['hash'],
+                label=link['label']) for user, link in zip(users, links)], batch_size=1000)
+        return users
+
+    def test_student_view(self):
+        """
+            The render of the student view and the student_status calls made
+            after it: first visit (the link is created), returning (done is verified),
+            finished and done
+        """
+        with patch('student.models.cc.User.save'):
+            student = UserFactory(username='bench_student')
+            CourseEnrollmentFactory(user=student, course_id=self.course.id)
+        self.reset()
+
+        def student_status():
+            self.make_xblock(student.id).student_status(TestRequest({}))
+        self.measure("student_view render", 1, self.make_xblock(student.id).student_view)
+        self.measure("student_status first visit", 1, student_status)
+        self.measure("student_status returning", 1, student_status)
+        self.server.links["11223344"][-1]['finishedAt'] = '2020-05-11T15:37:55.000Z'
+        cache.delete(link_index_key("11223344"))
+        self.measure("student_status finished", 1, student_status)
+        self.measure("student_status done", 1, student_status)
+        self.report()
+
+    def test_show_score(self):
+        """
+            show_score with refresh for each size of EOL_TIMIFY_BENCHMARK_SIZES
+        """
+        with patch('student.models.cc.User.save'):
+            staff = UserFactory(username='bench_staff')
+        total = 0
+        for size in get_sizes():
+            self.enroll(size - total)
+            total = size
+            self.reset()
+            xblock = self.make_xblock(staff.id, staff=True)
+            response = []
+            self.measure("show_score sync", size, lambda: response.append(xblock.show_score(TestRequest({'refresh': True}))))
+            data = json.loads(response[0]._app_iter[0].decode())
+            self.assertEqual(data['result'], 'success')
+            self.assertEqual(len(data['list_student']), size)
+            self.measure("show_score snapshot", size, lambda: xblock.show_score(TestRequest({})))
+        self.report()
@@ -0,0 +1,358 @@
+"""
+Client to access quilgo.com api
+"""
+import os
+import time
+import random
+import threading
+import logging
+from email.utils import parsedate_tz, mktime_tz
+
+import requests
+from requests.adapters import HTTPAdapter
+from six.moves import http_cookiejar
+from django.conf import settings as DJANGO_SETTINGS
+from django.core.cache import cache
+
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+QUILGO_API_URL = "https://quilgo.com/api/v1"
+QUILGO_LINK_URL = "https://quilgo.com/link/"
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# not processed by quilgo, safe to retry requests that are not idempotent
+RETRY_STATUS_NOT_PROCESSED = (429,)
+
+BREAKER_FAILURES_KEY = "eol_timify-breaker-failures"
+BREAKER_OPEN_KEY = "eol_timify-breaker-open"
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_breaker = {'failed': False}
+
+
+class QuilgoError(Exception):
+    """
+    quilgo.com didn't answer in time, failed to connect or the circuit breaker is open
+    """
+    pass
+
+
+class QuilgoRateLimited(Exception):
+    """
+    There are no tokens in the rate limit bucket, the call must be retried later
+    """
+    pass
+
+
+def get_bucket(path):
+    """
+        Return the rate limit bucket of the api path
+    """
+    return 'create' if path == "~/Link/bulk" else 'read'
+
+
+def take_token(bucket, tokens, seconds):
+    """
+        Take a token of the bucket if there is one, return 0 or the seconds
+        until the next token. The bucket keeps the stored tokens and the time
+        of the last refill, it's refilled with tokens / seconds per second up
+        to 'tokens'. Return None if another worker is updating the bucket.
+    """
+    key = "eol_timify-rate-{}".format(bucket)
+    lock_key = key + "-lock"
+    if not cache.add(lock_key, True, 1):
+        return None
+    try:
+        now = time.time()
+        state = cache.get(key)
+        if state is None:
+            state = {'tokens': float(tokens), 'time': now}
+        stored = min(float(tokens), state['tokens'] + (now - state['time']) * tokens / seconds)
+        if stored >= 1:
+            cache.set(key, {'tokens': stored - 1, 'time': now}, seconds * 2)
+            return 0
+        cache.set(key, {'tokens': stored, 'time': now}, seconds * 2)
+        return (1 - stored) * seconds / tokens
+    finally:
+        cache.delete(lock_key)
+
+
+def acquire_token(bucket, wait=None):
+    """
+        Take a token of the bucket shared by all workers, each bucket has
+        EOL_TIMIFY_RATE_LIMITS[bucket] = (tokens, seconds): at most 'tokens'
+        calls in a burst and 'tokens' per 'seconds' after it. Wait up to
+        'wait' seconds for a token, return False if there isn't one.
+    """
+    limit = DJANGO_SETTINGS.EOL_TIMIFY_RATE_LIMITS.get(bucket)
+    if not limit:
+        return True
+    tokens, seconds = limit
+    if tokens <= 0:
+        return False
+    if wait is None:
+        wait = DJANGO_SETTINGS.EOL_TIMIFY_RATE_LIMIT_WAIT
+    deadline = time.time() + wait
+    while True:
+        delay = take_token(bucket, tokens, seconds)
+        if delay == 0:
+            return True
+        if delay is None:
+            # the bucket is being updated by another worker
+            delay = random.uniform(0, 0.01)
+        else:
+            # the waiters don't wake up at the same time
+            delay += random.uniform(0, float(seconds) / tokens)
+        if time.time() + delay > deadline:
+            return False
+        time.sleep(delay)
+
+
+def breaker_is_open():
+    """
+        Return True if quilgo.com calls are suspended for all workers
+    """
+    return cache.get(BREAKER_OPEN_KEY) is not None
+
+
+def breaker_failure():
+    """
+        Count a failed call, after EOL_TIMIFY_BREAKER_FAILURES failures in
+        EOL_TIMIFY_BREAKER_WINDOW seconds the calls are suspended
+        EOL_TIMIFY_BREAKER_COOLDOWN seconds.
+    """
+    _breaker['failed'] = True
+    cache.add(BREAKER_FAILURES_KEY, 0, DJANGO_SETTINGS.EOL_TIMIFY_BREAKER_WINDOW)
+    try:
+        failures = cache.incr(BREAKER_FAILURES_KEY)
+    except ValueError:
+        # the key expired between add and incr
+        cache.set(BREAKER_FAILURES_KEY, 1, DJANGO_SETTINGS.EOL_TIMIFY_BREAKER_WINDOW)
+        failures = 1
+    if failures >= DJANGO_SETTINGS.EOL_TIMIFY_BREAKER_FAILURES:
+        cache.set(BREAKER_OPEN_KEY, True, DJANGO_SETTINGS.EOL_TIMIFY_BREAKER_COOLDOWN)
+        cache.delete(BREAKER_FAILURES_KEY)
+        log.error("Quilgo circuit breaker open for {} seconds after {} failures".format(
+            DJANGO_SETTINGS.EOL_TIMIFY_BREAKER_COOLDOWN, failures))
+
+
+def breaker_success():
+    """
+        Reset the failure count after a successful call
+    """
+    if _breaker['failed']:
+        _breaker['failed'] = False
+        cache.delete(BREAKER_FAILURES_KEY)
+
+
+def get_timeout(path, remaining=None):
+    """
+        Return (connect, read) timeout of the api path,
+        at most 'remaining' seconds each
+    """
+    timeout = DJANGO_SETTINGS.EOL_TIMIFY_TIMEOUTS.get(path, DJANGO_SETTINGS.EOL_TIMIFY_TIMEOUT)
+    if isinstance(timeout, (list, tuple)):
+        timeout = tuple(timeout)
+        if remaining is not None:
+            timeout = tuple(min(value, remaining) for value in timeout)
+        return timeout
+    if remaining is not None:
+        return min(timeout, remaining)
+    return timeout
+
+
+def get_retry_after(result):
+    """
+        Return the seconds to wait of the Retry-After header or None
+    """
+    if result is None:
+        return None
+    value = result.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0, float(value))
+    except ValueError:
+        date = parsedate_tz(value)
+        if date is None:
+            return None
+        return max(0, mktime_tz(date) - time.time())
+
+
+def get_backoff(attempt):
+    """
+        Return the jittered exponential backoff of the attempt
+    """
+    delay = min(
+        DJANGO_SETTINGS.EOL_TIMIFY_RETRY_MAX_BACKOFF,
+        DJANGO_SETTINGS.EOL_TIMIFY_RETRY_BACKOFF * (2 ** attempt))
+    return random.uniform(0, delay)
+
+
+class QuilgoClient(object):
+    """
+    Wrapper of a pooled requests.Session, the connections to quilgo.com
+    are reused between calls instead of opening a new TCP+TLS connection
+    for each one.
+    """
+
+    def __init__(self, base_url=None, pool_size=None, keep_alive=None, headers=None):
+        if base_url is None:
+            base_url = DJANGO_SETTINGS.EOL_TIMIFY_API_URL
+        if pool_size is None:
+            pool_size = DJANGO_SETTINGS.EOL_TIMIFY_POOL_SIZE
+        if keep_alive is None:
+            keep_alive = DJANGO_SETTINGS.EOL_TIMIFY_KEEP_ALIVE
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # The session is shared by all threads of the process, so cookies
+        # are never stored on it, they are sent on each request.
+        self.session.cookies.set_policy(
+            http_cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        self.session.headers.update({'content-type': 'application/json'})
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        if headers:
+            self.session.headers.update(headers)
+
+    def url(self, path):
+        """
+            Return the absolute url of an api path
+        """
+        return "{}/{}".format(self.base_url, path.lstrip("/"))
+
+    def _auth(self, connectsid, apiKey):
+        """
+            Return cookies and headers to authenticate a request
+        """
+        cookies = {}
+        headers = {}
+        if connectsid:
+            cookies['connect.sid'] = connectsid
+        if apiKey:
+            headers['x-api-key'] = apiKey
+        return cookies, headers
+
+    def request(self, method, path, idempotent=None, **kwargs):
+        """
+            Send a request with the timeout of the path, raise QuilgoError if it
+            fails or the circuit breaker is open.
+            Idempotent requests (GET by default) are retried on 429/5xx and errors,
+            the others only when quilgo didn't process them (429 or connect timeout),
+            all within EOL_TIMIFY_REQUEST_DEADLINE seconds.
+        """
+        if idempotent is None:
+            idempotent = method == 'get'
+        retry_status = RETRY_STATUS if idempotent else RETRY_STATUS_NOT_PROCESSED
+        retry_error = requests.RequestException if idempotent else requests.ConnectTimeout
+        deadline = time.time() + DJANGO_SETTINGS.EOL_TIMIFY_REQUEST_DEADLINE
+        name = "quilgo." + metrics.endpoint_name(path)
+        attempt = 0
+        result = None
+        while True:
+            if breaker_is_open():
+                metrics.incr(name + ".breaker_open")
+                raise QuilgoError("Quilgo circuit breaker is open, path: {}".format(path))
+            if not acquire_token(get_bucket(path)):
+                metrics.incr(name + ".rate_limited")
+                raise QuilgoRateLimited("Quilgo rate limit reached, path: {}".format(path))
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                if result is not None:
+                    return result
+                raise QuilgoError("Quilgo request deadline exceeded, path: {}".format(path))
+            error = None
+            result = None
+            start = time.time()
+            try:
+                # each attempt ends before the deadline of the request
+                result = getattr(self.session, method)(
+                    self.url(path),
+                    timeout=get_timeout(path, remaining),
+                    **kwargs)
+            except requests.RequestException as e:
+                metrics.timing(name + ".latency", (time.time() - start) * 1000)
+                metrics.incr(name + ".error")
+                breaker_failure()
+                error = e
+            else:
+                metrics.timing(name + ".latency", (time.time() - start) * 1000)
+                metrics.incr("{}.status.{}".format(name, result.status_code))
+                if result.status_code >= 500:
+                    breaker_failure()
+                else:
+                    breaker_success()
+                if result.status_code not in retry_status:
+                    return result
+            retry = error is None or isinstance(error, retry_error)
+            delay = get_retry_after(result)
+            if delay is None:
+                delay = get_backoff(attempt)
+            attempt += 1
+            if not retry or attempt > DJANGO_SETTINGS.EOL_TIMIFY_RETRIES or time.time() + delay > deadline:
+                if error is not None:
+                    raise QuilgoError("Error in quilgo request, path: {}, error: {}".format(path, error))
+                return result
+            log.warning("Retry quilgo request in {:.2f} seconds, path: {}, attempt: {}".format(delay, path, attempt))
+            time.sleep(delay)
+
+    def get(self, path, connectsid=None, apiKey=None, params=None):
+        """
+            GET request to quilgo api
+        """
+        cookies, headers = self._auth(connectsid, apiKey)
+        return self.request(
+            'get',
+            path,
+            params=params,
+            cookies=cookies,
+            headers=headers)
+
+    def post(self, path, data=None, connectsid=None, apiKey=None, idempotent=False):
+        """
+            POST request to quilgo api, data is sent as json
+        """
+        cookies, headers = self._auth(connectsid, apiKey)
+        return self.request(
+            'post',
+            path,
+            idempotent=idempotent,
+            data=data,
+            cookies=cookies,
+            headers=headers)
+
+
+def get_client():
+    """
+        Return the QuilgoClient of the current process,
+        a new one is created after a fork.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = QuilgoClient()
+                _client_pid = pid
+    return _client
+
+
+def reset_client():
+    """
+        Discard the QuilgoClient of the current process
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
+        _client_pid = None
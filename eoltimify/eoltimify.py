@@ -3,7 +3,6 @@ import six
 import six.moves.urllib.error
 import six.moves.urllib.parse
 import six.moves.urllib.request
-import requests
 import logging
 import json
 from six import text_type
@@ -19,12 +18,22 @@ from xblock.core import XBlock
 from xblock.fields import Integer, Scope, String, Dict, Float, Boolean, List, DateTime, JSONField
 from xblock.fragment import Fragment
 from xblockutils.studio_editable import StudioEditableXBlockMixin
+from . import metrics
+from .client import QuilgoRateLimited, QUILGO_LINK_URL
+from .auth import get_api_token
+from .links import get_link_index, read_link, link_index_key, refresh_link_index, create_links, save_links, is_late, set_link_result, queue_link_creation, link_lock_key
+from .utils import wait_lock
+from .forms import get_forms, refresh_forms
+from .scores import get_scores_snapshot, save_scores_snapshot, queue_scores_sync
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from datetime import datetime
 import pytz
 
 log = logging.getLogger(__name__)
 loader = ResourceLoader(__name__)
+# Decoded resources and compiled templates by path, not used with DEBUG
+_resources = {}
+_templates = {}
 # Make '_' a no-op so we can scrape strings
 
 
@@ -75,14 +84,30 @@ class EolTimifyXBlock(StudioEditableXBlockMixin, XBlock):
         default="",
         scope=Scope.settings
     )
+    max_points = Integer(
+        display_name="Puntaje Maximo",
+        default=0,
+        scope=Scope.settings,
+        values={'min': 0},
+        help="Puntaje maximo publicado en las calificaciones del curso, con 0 no se publica"
+    )
     has_author_view = True
     has_score = True
-    editable_fields = ('idform', 'autoclose', 'duration', 'display_name')
+    editable_fields = ('idform', 'autoclose', 'duration', 'display_name', 'max_points')
+
+    def max_score(self):
+        """
+        Return the max score of the block in the gradebook.
+        """
+        return self.max_points
 
     def resource_string(self, path):
         """Handy helper for getting resources from our kit."""
-        data = pkg_resources.resource_string(__name__, path)
-        return data.decode("utf8")
+        data = _resources.get(path)
+        if data is None or DJANGO_SETTINGS.DEBUG:
+            data = pkg_resources.resource_string(__name__, path).decode("utf8")
+            _resources[path] = data
+        return data
 
     @reify
     def block_course_id(self):
@@ -119,49 +144,92 @@ class EolTimifyXBlock(StudioEditableXBlockMixin, XBlock):
         in_studio_preview = self.scope_ids.user_id is None
         return self.is_course_staff() and not in_studio_preview
 
-    def get_link(self, student_id):
+    def get_link_row(self, student_id):
         """
-        Return student's link
+        Return the EolTimifyLink of the student in this block or None
         """
-        from lms.djangoapps.courseware.models import StudentModule
+        from .models import EolTimifyLink
         try:
-            student_module = StudentModule.objects.get(
-                student_id=student_id,
-                course_id=self.course_id,
-                module_state_key=self.location
-            )
-        except StudentModule.DoesNotExist:
-            student_module = None
+            return EolTimifyLink.objects.get(
+                usage_key=self.location,
+                user_id=student_id)
+        except EolTimifyLink.DoesNotExist:
+            return None
 
-        if student_module:
-            return json.loads(student_module.state)
-        return {}
+    def get_link_rows(self, student_ids=None):
+        """
+        Return the EolTimifyLink rows of this block by user_id, in one query
+        """
+        from .models import EolTimifyLink
+        rows = EolTimifyLink.objects.filter(usage_key=self.location)
+        if student_ids is not None:
+            rows = rows.filter(user_id__in=student_ids)
+        return {row.user_id: row for row in rows}
 
-    def get_or_create_student_module(self, student_id):
+    def update_link_rows(self, rows):
         """
-        Gets or creates a StudentModule for the given user for this block
-        Returns:
-            StudentModule: A StudentModule object
+        Save the result of the EolTimifyLink rows with one bulk_update per chunk,
+        return the number of updated rows
         """
-        # pylint: disable=no-member
-        from lms.djangoapps.courseware.models import StudentModule
-        student_module, created = StudentModule.objects.get_or_create(
-            course_id=self.course_id,
-            module_state_key=self.location,
-            student_id=student_id,
-            defaults={
-                'state': '{}',
-                'module_type': self.category,
-            }
-        )
-        if created:
-            log.info(
-                "Created student module %s [course: %s] [student: %s]",
-                student_module.module_state_key,
-                student_module.course_id,
-                student_module.student.username
-            )
-        return student_module
+        from django.db import transaction
+        from .models import EolTimifyLink
+        batch_size = DJANGO_SETTINGS.EOL_TIMIFY_DB_BATCH_SIZE
+        for i in range(0, len(rows), batch_size):
+            with transaction.atomic():
+                EolTimifyLink.objects.bulk_update(
+                    rows[i:i + batch_size],
+                    ['finished_at', 'done', 'late', 'score'])
+        return len(rows)
+
+    def get_grade(self, score):
+        """
+        Return the quilgo score as grade of the block, None if it can't be published.
+        A score above max_points is not published, the form doesn't match the block.
+        """
+        if self.max_points <= 0:
+            return None
+        try:
+            grade = float(score)
+        except (TypeError, ValueError):
+            return None
+        if grade > self.max_points:
+            log.error("Score {} above max_points {}, block: {}".format(score, self.max_points, self.location))
+            return None
+        return grade
+
+    def publish_grades(self, grades):
+        """
+        Publish the grades [(student_id, grade)] in the gradebook and save them
+        as published_score after each chunk of EOL_TIMIFY_GRADE_BATCH_SIZE students,
+        so the grades not sent on error are published in the next sync.
+        Each grade is still one SCORE_PUBLISHED signal.
+        """
+        from django.contrib.auth.models import User
+        from lms.djangoapps.grades.signals.signals import SCORE_PUBLISHED
+        batch_size = DJANGO_SETTINGS.EOL_TIMIFY_GRADE_BATCH_SIZE
+        for i in range(0, len(grades), batch_size):
+            chunk = grades[i:i + batch_size]
+            users = User.objects.in_bulk([student_id for student_id, grade in chunk])
+            for student_id, grade in chunk:
+                SCORE_PUBLISHED.send(
+                    sender=None,
+                    block=self,
+                    user=users[student_id],
+                    raw_earned=grade,
+                    raw_possible=self.max_points,
+                    only_if_higher=False,
+                    score_deleted=False)
+            self.save_published_scores(dict(chunk))
+
+    def save_published_scores(self, grades):
+        """
+        Save the published grades {student_id: grade} in the EolTimifyLink rows
+        """
+        from .models import EolTimifyLink
+        rows = list(EolTimifyLink.objects.filter(usage_key=self.location, user_id__in=list(grades.keys())))
+        for row in rows:
+            row.published_score = grades[row.user_id]
+        EolTimifyLink.objects.bulk_update(rows, ['published_score'])
 
     def is_past_due(self):
         """
@@ -241,9 +309,14 @@ class EolTimifyXBlock(StudioEditableXBlockMixin, XBlock):
         return fragment
 
     def student_view(self, context=None):
-        context = self.get_context()
-        template = self.render_template(
-            'static/html/eoltimify.html', context)
+        with metrics.timer("student_view.context"):
+            context = self.get_context(resolve=False)
+        with metrics.timer("student_view.render"):
+            if not context['is_course_staff']:
+                context['student_html'] = self.render_template(
+                    'static/html/eoltimify_student.html', context)
+            template = self.render_template(
+                'static/html/eoltimify.html', context)
         frag = Fragment(template)
         frag.add_css(self.resource_string("static/css/eoltimify.css"))
         frag.add_javascript(self.resource_string(
@@ -251,7 +324,11 @@ class EolTimifyXBlock(StudioEditableXBlockMixin, XBlock):
         frag.initialize_js('EolTimifyXBlock')
         return frag
 
-    def get_context(self):
+    def get_context(self, resolve=True):
+        """
+        Return the context of the view, without resolve the link of the
+        student is not verified in quilgo and 'pending' is set instead.
+        """
         aux = self.block_course_id
         course_key = CourseKey.from_string(aux)
         context = {'xblock': self}
@@ -269,245 +346,350 @@ class EolTimifyXBlock(StudioEditableXBlockMixin, XBlock):
 
             if self.is_past_due():
                 context["expired"] = True
-                state = self.get_link(user_id)
-                if len(state) > 0:
-                    context["score"] = state['score']
+                row = self.get_link_row(user_id)
+                if row is not None:
+                    context["score"] = row.score
                 return context
 
             if id_form != "":
-                connectsid, apiKey = self.get_api_token()
-                if connectsid is False:
+                row = self.get_link_row(user_id)
+                if row is not None and row.id_form == id_form and row.done:
+                    # finished links never change, quilgo is not called again
+                    context['done'] = True
+                    return self.set_link_context(context, row)
+                if not resolve:
+                    # resolved by student_status after the page is loaded
+                    context['pending'] = True
                     return context
-                student_module = self.get_or_create_student_module(user_id)
-                state = json.loads(student_module.state)
-                if len(state) == 0:
-                    context = self.create_link(
-                        context, connectsid, apiKey, student_module, state)
-
-                elif state["id_form"] == id_form:
-                    from dateutil.parser import parse
-                    context['done'] = self.get_done(
-                        state['id_link'], connectsid, apiKey)
-                    context['timify'] = True
-                    context['link'] = "https://quilgo.com/link/" + state['link']
-                    context['name_link'] = state['name_link']
-                    context['id_form'] = id_form
-                    context['score'] = state['score']
-
-                    expired_date = self.expired_date()
-                    if state['expired'] is not None and expired_date is not None:
-                        context['late'] = parse(
-                            state['expired']) > expired_date
-                    else:
-                        context['late'] = "Sin Registros"
-                else:
-                    context = self.create_link(
-                        context, connectsid, apiKey, student_module, state)
+
+                try:
+                    context = self.resolve_link(context, row)
+                except QuilgoRateLimited:
+                    log.warning("Quilgo rate limit reached, user_id: {}".format(user_id))
+                    context['retry'] = True
 
         return context
 
-    def create_link(self, context, connectsid, apiKey, student_module, state):
+    def resolve_link(self, context, row):
+        """
+            Create the link of the student or verify if it was done
+        """
+        id_form = self.idform
+        if row is None or row.id_form != id_form:
+            return self.provision_link(context)
+        connectsid, apiKey = self.get_api_token()
+        if connectsid is False:
+            return context
+
+        try:
+            link = self.get_link_status(row.id_link, connectsid, apiKey)
+        except QuilgoRateLimited:
+            # the link is shown, it will be verified in the next view
+            link = None
+        context['done'] = link is not None and link['finishedAt'] is not None
+        if context['done']:
+            set_link_result(row, link['finishedAt'], link['score'], self.expired_date())
+            row.save()
+        return self.set_link_context(context, row)
+
+    def set_link_context(self, context, row):
+        """
+            Set the link data of the EolTimifyLink of the student in the context
+        """
+        context['timify'] = True
+        context['link'] = QUILGO_LINK_URL + row.hash
+        context['name_link'] = row.label
+        context['id_form'] = row.id_form
+        context['score'] = row.score
+        late = is_late(row.finished_at, self.expired_date())
+        context['late'] = late if late is not None else "Sin Registros"
+        return context
+
+    def provision_link(self, context):
+        """
+            Queue the creation of the link of the student, the block is shown
+            as provisioning until it exists. With CELERY_ALWAYS_EAGER the link
+            is created in the request.
+        """
+        if getattr(DJANGO_SETTINGS, 'CELERY_ALWAYS_EAGER', False):
+            connectsid, apiKey = self.get_api_token()
+            if connectsid is False:
+                return context
+            return self.create_link(context, connectsid, apiKey)
+        queue_link_creation(self.block_id, self.scope_ids.user_id, self.idform)
+        context['provisioning'] = True
+        return context
+
+    def create_link(self, context, connectsid, apiKey):
         """
             Create user link
         """
+        row = self.create_student_link(self.scope_ids.user_id, connectsid, apiKey)
+        if row is not None:
+            context['done'] = False
+            context = self.set_link_context(context, row)
+        return context
+
+    def get_form_link_row(self, user_id):
+        """
+        Return the EolTimifyLink of the student with the current form or None
+        """
+        row = self.get_link_row(user_id)
+        if row is not None and row.id_form == self.idform:
+            return row
+        return None
+
+    def create_student_link(self, user_id, connectsid, apiKey):
+        """
+            Create the link of the student in quilgo, return its EolTimifyLink or None.
+            Only one worker creates the link of a student at a time, the others
+            wait up to EOL_TIMIFY_LINK_WAIT seconds for its result.
+        """
+        lock_key = link_lock_key(self.location, user_id)
+        if not cache.add(lock_key, True, DJANGO_SETTINGS.EOL_TIMIFY_LINK_LOCK_TIMEOUT):
+            row = wait_lock(lambda: self.get_form_link_row(user_id), lock_key, DJANGO_SETTINGS.EOL_TIMIFY_LINK_WAIT)
+            if row is None:
+                log.warning("Link of the student is being created in another request, user: {}".format(user_id))
+            return row
+        try:
+            # the link may have been created while the lock was taken
+            row = self.get_form_link_row(user_id)
+            if row is not None:
+                return row
+            return self._create_student_link(user_id, connectsid, apiKey)
+        finally:
+            cache.delete(lock_key)
+
+    def _create_student_link(self, user_id, connectsid, apiKey):
         from django.contrib.auth.models import User
-        user_id = self.scope_ids.user_id
         id_form = self.idform
-        times = self.duration
-        fClose = True if self.autoclose == "Si" else False
-        pageId = int(id_form)
         student = User.objects.filter(
             id=user_id).order_by('username').values(
             'id', 'username', 'email')
-        links = [{"text": student[0]['username']}]
-
-        parameters = {
-            "labels": links,
-            "expiresIn": times,
-            "forceClose": fClose,
-            "pageId": pageId}  # links=[{"text":"test1"},{"text":"test3"},{"text":"test4"}]
-
-        result = requests.post(
-            "https://quilgo.com/api/v1/~/Link/bulk",
-            data=json.dumps(parameters),
-            cookies={
-                'connect.sid': connectsid},
-            headers={
-                'content-type': 'application/json',
-                "x-api-key": apiKey})
-
-        if result.status_code == 200:
-            datajson = json.loads(result.text)
-            state['id_form'] = id_form
-            state['link'] = datajson['links'][0]['hash']
-            state['name_link'] = datajson['links'][0]['label']
-            state['id_link'] = str(datajson['links'][0]['id'])
-            state['score'] = 'Sin Registros'
-            state['expired'] = None
-            context['timify'] = True
-            context['done'] = False
-            student_module.state = json.dumps(state)
-            student_module.save()
-            context['link'] = "https://quilgo.com/link/" + \
-                state['link']
-            context['name_link'] = state['name_link']
-            context['id_form'] = id_form
-            context['score'] = state['score']
-            context['late'] = "Sin Registros"
-        else:
-            log.error("Error in create link, user: {}, parameters: {}, response: {}".format(self.scope_ids.user_id, parameters, result.content))
-        return context
 
-    def get_done(self, id_link, connectsid, apiKey):
+        links = create_links(
+            id_form,
+            [student[0]['username']],
+            self.duration,
+            self.autoclose,
+            connectsid,
+            apiKey)
+
+        if links is None:
+            log.error("Error in create link, user: {}".format(user_id))
+            return None
+        rows = save_links(self.course_id, self.location, id_form, {user_id: links[0]})
+        return rows[0] if len(rows) > 0 else None
+
+    @XBlock.json_handler
+    def student_status(self, data, suffix=''):
+        """
+            Resolve the link, done status and score of the student,
+            called by the student view after the page is loaded.
         """
-            Verify if the link was done
-            params: finishedAt is Datetime when link was done 
+        if self.show_staff_grading_interface():
+            return {'result': 'error'}
+        with metrics.timer("student_status.duration"):
+            context = self.get_context()
+        return {
+            'result': 'success',
+            'html': self.render_template('static/html/eoltimify_student.html', context),
+            'timify': context['timify'],
+            'done': context.get('done', False),
+            'retry': context.get('retry', False),
+            'provisioning': context.get('provisioning', False),
+            'expired': context['expired'],
+            'link': context.get('link'),
+            'score': context['score']}
+
+    def get_link_status(self, id_link, connectsid, apiKey):
+        """
+            Return finishedAt and score of the link, None if it's not found
         """
         id_form = self.idform
-        result = requests.get(
-            "https://quilgo.com/api/v1/~/Link?formId={}&sortBy=createdAt".format(id_form),
-            cookies={
-                'connect.sid': connectsid},
-            headers={
-                'content-type': 'application/json',
-                "x-api-key": apiKey})
-
-        if result.status_code == 200:
-            datajson = json.loads(result.text)
-            for link in datajson["links"]:
-                if str(link['id']) == id_link:
-                    return link['finishedAt'] is not None
-        else:
-            log.error("Error get all links of {} form_id, user_id: {}, response: {}".format(id_form, self.scope_ids.user_id, result.content))
-        return False
+        # only the shard of the link is read when the index is cached
+        cached, link = read_link(link_index_key(id_form), id_link)
+        if cached:
+            return link
+        links = get_link_index(id_form, connectsid, apiKey)
+        if links is None:
+            log.error("Error get all links of {} form_id, user_id: {}".format(id_form, self.scope_ids.user_id))
+            return None
+        return links.get(id_link)
 
     def get_api_token(self):
         """
             Get connect.sid and api-key to access quilgo.com api
         """
-        data = cache.get("eol_timify-" + self.block_course_id + "-apikey")
-        if data is None:
-            connectsid = ""
-            if DJANGO_SETTINGS.TIMIFY_USER != "" and DJANGO_SETTINGS.TIMIFY_PASSWORD != "":
-                parameters = {
-                    "username": DJANGO_SETTINGS.TIMIFY_USER,
-                    "password": DJANGO_SETTINGS.TIMIFY_PASSWORD}
-                result = requests.post(
-                    "https://quilgo.com/api/v1/auth/ep",
-                    data=json.dumps(parameters),
-                    headers={
-                        'content-type': 'application/json'})
-                if result.status_code == 200:
-                    headers = result.headers["Set-Cookie"].split(";")
-                    for header in headers:
-                        if "connect.sid" in header:
-                            aux_id = header.split("=")
-                            connectsid = aux_id[2]
-
-                    result_api = requests.get(
-                        "https://quilgo.com/api/v1/~/Session",
-                        cookies={
-                            'connect.sid': connectsid},
-                        headers={
-                            'content-type': 'application/json'})
-                    if result_api.status_code == 200:
-                        data = json.loads(result_api.text)
-                        cache_data = [connectsid, data["session"]["api_token"]]
-                        cache.set("eol_timify-" + self.block_course_id + "-apikey", cache_data, DJANGO_SETTINGS.EOL_TIMIFY_TIME_CACHE)
-                        return cache_data[0], cache_data[1]
-                    else:
-                        log.error("Error to get api-key, user_id: {}, response: {}".format(self.scope_ids.user_id, result_api.content))
-                else:
-                    log.error("Error to get connect.sid, user_id: {}, response: {}".format(self.scope_ids.user_id, result.content))
-            else:
-                log.error("TIMIFY_USER or TIMIFY_PASSWORD not configured, user_id: {}".format(self.scope_ids.user_id))
-        else:
-            return data[0], data[1]
-        return False, False
+        return get_api_token(self.scope_ids.user_id)
 
     @XBlock.json_handler
     def show_score(self, data, suffix=''):
         """
-            Return a list with all score, finished date, email, name_link and username of the students
+            Return the last score sync of the block with its timestamp,
+            with 'refresh' a new sync is queued.
         """
+        if not self.show_staff_grading_interface():
+            return {'result': 'error'}
+        with metrics.timer("show_score.duration"):
+            snapshot = get_scores_snapshot(self.block_id)
+            queued = False
+            if snapshot is None or data.get('refresh'):
+                if getattr(DJANGO_SETTINGS, 'CELERY_ALWAYS_EAGER', False):
+                    snapshot = self.sync_scores()
+                else:
+                    queued = queue_scores_sync(self.block_id)
+            if snapshot is None:
+                return {'result': 'queued', 'queued': queued}
+            if snapshot['result'] == 'success':
+                snapshot = dict(snapshot, list_student=self.get_student_scores())
+                metrics.gauge("show_score.rows", len(snapshot['list_student']))
+        return dict(snapshot, queued=queued)
+
+    def get_student_scores(self):
+        """
+            Return the score, late, email, name_link and username of the
+            enrolled students from their EolTimifyLink rows
+        """
+        from django.contrib.auth.models import User
+        course_key = CourseKey.from_string(self.block_course_id)
+        enrolled_students = User.objects.filter(
+            courseenrollment__course_id=course_key,
+            courseenrollment__is_active=1
+        ).order_by('username').values('id', 'username', 'email')
+        rows = self.get_link_rows()
+        expired_date = self.expired_date()
+        list_student = []
+        for student in enrolled_students:
+            list_student.append([student['id'], student['username'], student['email']] +
+                                self.get_row_score(rows.get(student['id']), expired_date))
+        return list_student
+
+    def get_row_score(self, row, expired_date):
+        """
+            Return the name_link, score and late of the EolTimifyLink of a student,
+            the score of a link of another form is not shown
+        """
+        if row is None:
+            return ["Sin Registros", "Sin Registros", "Sin Registros"]
+        if row.id_form != self.idform:
+            return [row.label, "Sin Registros", "Sin Registros"]
+        late = is_late(row.finished_at, expired_date)
+        if late is not None:
+            aux_date = "Si" if late else "No"
+        else:
+            aux_date = "Sin Registros"
+        return [row.label, row.score, aux_date]
+
+    def sync_scores(self):
+        """
+            Update the score and finished date of the students and save a snapshot
+            with the timestamp and the number of updated rows, the list of scores
+            is read from the EolTimifyLink rows by show_score
+        """
+        try:
+            with metrics.timer("sync_scores.duration"):
+                result = self._sync_scores()
+        except QuilgoRateLimited:
+            log.error("Quilgo rate limit reached in score sync, pageId: {}".format(self.idform))
+            result = {'result': 'error'}
+        metrics.incr("sync_scores.{}".format(result['result']))
+        if result['result'] == 'success':
+            metrics.gauge("sync_scores.rows", result['rows'])
+            metrics.incr("sync_scores.updated", result['updated'])
+        return save_scores_snapshot(self.block_id, result)
+
+    def _sync_scores(self):
         pageId = self.idform
         user_id = self.scope_ids.user_id
         connectsid, apiKey = self.get_api_token()
         if connectsid is False:
             log.error("Error with get api_key or connect.sid, pageId: {}, user_id: {}".format(pageId,user_id))
             return {'result': 'error'}
-        result = requests.get(
-            "https://quilgo.com/api/v1/~/Link?formId={}&sortBy=createdAt".format(pageId),
-            cookies={
-                'connect.sid': connectsid},
-            headers={
-                'content-type': 'application/json',
-                "x-api-key": apiKey})
-
-        if result.status_code == 200:
+        aux_links = refresh_link_index(pageId, connectsid, apiKey)
+
+        if aux_links is not None:
             from django.contrib.auth.models import User
-            from dateutil.parser import parse
             aux = self.block_course_id
             course_key = CourseKey.from_string(aux)
             enrolled_students = User.objects.filter(
                 courseenrollment__course_id=course_key,
                 courseenrollment__is_active=1
-            ).order_by('username').values('id', 'username', 'email')
-            datajson = json.loads(result.text)
-            aux_links = datajson["links"]
+            ).values_list('id', flat=True)
             if len(aux_links) > 0:
                 links = {}
-                for link in aux_links:
-                    ids = str(link['id'])
+                for ids, link in aux_links.items():
                     links[ids] = [str(link['score']) if link['score']
                                   is not None else "Sin Registros", link["finishedAt"]]
-                list_student = []
-                for student in enrolled_students:
-                    student_module = self.get_or_create_student_module(
-                        student['id'])
-                    state = json.loads(student_module.state)
-
-                    if len(state) > 0 and state['id_link'] in links:
-                        id_link = state['id_link']
-                        expired_date = self.expired_date()
-                        if links[id_link][1] is not None and expired_date is not None:
-                            aux_date = "Si" if parse(
-                                links[id_link][1]) > expired_date else "No"
-                        else:
-                            aux_date = "Sin Registros"
-                        list_student.append([student['id'],
-                                             student['username'],
-                                             student['email'],
-                                             state['name_link'],
-                                             links[id_link][0],
-                                             aux_date])
-                        state['score'] = links[id_link][0]
-                        state['expired'] = links[id_link][1]
-                        student_module.state = json.dumps(state)
-                        student_module.save()
-                    elif len(state) > 0:
-                        list_student.append([student['id'],
-                                             student['username'],
-                                             student['email'],
-                                             state['name_link'],
-                                             "Sin Registros",
-                                             "Sin Registros"])
-                    else:
-                        list_student.append([student['id'],
-                                             student['username'],
-                                             student['email'],
-                                             "Sin Registros",
-                                             "Sin Registros",
-                                             "Sin Registros"])
+                rows = self.get_link_rows()
+                changed_rows = []
+                grades = []
+                expired_date = self.expired_date()
+                students = 0
+                for student_id in enrolled_students:
+                    students += 1
+                    row = rows.get(student_id)
+                    if row is not None and row.id_link in links:
+                        id_link = row.id_link
+                        changed = set_link_result(row, links[id_link][1], links[id_link][0], expired_date)
+                        grade = self.get_grade(row.score)
+                        if grade is not None and row.published_score != grade:
+                            grades.append((student_id, grade))
+                        if changed:
+                            changed_rows.append(row)
+                updated = self.update_link_rows(changed_rows)
+                self.publish_grades(grades)
                 return {
                     'result': 'success',
-                    'list_student': list_student}
+                    'rows': students,
+                    'updated': updated}
             else:
                 return {'result': 'error2'}
         else:
-            log.error("Error to get all Links, pageId: {}, userId: {}, response: {}".format(pageId, user_id, result.content))
+            log.error("Error to get all Links, pageId: {}, userId: {}".format(pageId, user_id))
         return {'result': 'error'}
 
+    def iter_csv_rows(self):
+        """
+            Generate the rows of the score csv, the students are read by
+            chunks of EOL_TIMIFY_DB_BATCH_SIZE with their EolTimifyLink rows
+        """
+        from django.contrib.auth.models import User
+        course_key = CourseKey.from_string(self.block_course_id)
+        batch_size = DJANGO_SETTINGS.EOL_TIMIFY_DB_BATCH_SIZE
+        expired_date = self.expired_date()
+        yield ['Username', 'Correo', 'Nombre Test', 'Puntaje', 'Atrasado']
+        last_id = 0
+        while True:
+            students = list(User.objects.filter(
+                courseenrollment__course_id=course_key,
+                courseenrollment__is_active=1,
+                id__gt=last_id
+            ).order_by('id').values('id', 'username', 'email')[:batch_size])
+            if len(students) == 0:
+                break
+            rows = self.get_link_rows([student['id'] for student in students])
+            for student in students:
+                yield [student['username'], student['email']] + self.get_row_score(rows.get(student['id']), expired_date)
+            last_id = students[-1]['id']
+
+    @XBlock.json_handler
+    def recheck_done(self, data, suffix=''):
+        """
+            Clear the stored done status so it is verified again in quilgo,
+            of one student if 'student_id' is given or of all students.
+        """
+        from .models import EolTimifyLink
+        if not self.show_staff_grading_interface():
+            return {'result': 'error'}
+        rows = EolTimifyLink.objects.filter(
+            usage_key=self.location,
+            done=True)
+        if data.get('student_id'):
+            rows = rows.filter(user_id=data['student_id'])
+        updated = rows.update(done=False)
+        return {'result': 'success', 'updated': updated}
+
     @XBlock.json_handler
     def studio_submit(self, data, suffix=''):
         """
@@ -518,11 +700,14 @@ class EolTimifyXBlock(StudioEditableXBlockMixin, XBlock):
         self.duration = int(data.get('duration')) or self.duration.default
         self.autoclose = data.get('autoclose') or self.autoclose.default
         self.idform = data.get('idform') or ""
+        self.max_points = int(data.get('max_points', self.max_points) or 0)
         return {'result': 'success'}
 
     def render_template(self, template_path, context):
-        template_str = self.resource_string(template_path)
-        template = Template(template_str)
+        template = _templates.get(template_path)
+        if template is None or DJANGO_SETTINGS.DEBUG:
+            template = Template(self.resource_string(template_path))
+            _templates[template_path] = template
         return template.render(Context(context))
 
         # workbench while developing your XBlock.
@@ -546,26 +731,17 @@ class EolTimifyXBlock(StudioEditableXBlockMixin, XBlock):
         """
             Get all id form
         """
-        connectsid, apiKey = self.get_api_token()
-        list_form = []
-        if connectsid is not False:
-
-            result = requests.get(
-                "https://quilgo.com/api/v1/~/Page/all",
-                cookies={
-                    'connect.sid': connectsid},
-                headers={
-                    'content-type': 'application/json',
-                    "x-api-key": apiKey})
-            if result == 200:
-                data = json.loads(result.text)
-                list_form = [{"display_name": x['label'],
-                            "value": str(x['id'])} for x in data['pages']]
-            else:
-                log.error("Error in get all Forms, api_key: {}, connect.sid: {}, response: {}".format( apiKey, connectsid, result.content))
-        else:
-            log.error("Error with get api token or connect.sid")
-        return list_form
+        return get_forms(self.scope_ids.user_id)
+
+    @XBlock.json_handler
+    def refresh_idform(self, data, suffix=''):
+        """
+            Download again the forms of the account, called from Studio.
+        """
+        forms = refresh_forms(self.scope_ids.user_id)
+        if forms is None:
+            return {'result': 'error'}
+        return {'result': 'success', 'forms': forms}
 
     def _make_field_info2(self, field_name, field):  # pylint: disable=too-many-statements
         """
@@ -0,0 +1,144 @@
+"""
+Local stand-in of the quilgo.com api used by the benchmark, with configurable
+latency, error rate and number of links of each form.
+
+    server = FakeQuilgoServer(latency=0.05, error_rate=0.01, link_count=1000)
+    server.start()
+    ... EOL_TIMIFY_API_URL = server.url ...
+    server.stop()
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from socketserver import ThreadingMixIn
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeQuilgoHandler(BaseHTTPRequestHandler):
+    """
+    Answer the quilgo api calls made by eoltimify
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length == 0:
+            return {}
+        return json.loads(self.rfile.read(length).decode('utf-8'))
+
+    def fail(self):
+        """
+            Wait the latency of the server and return True if the call must fail
+        """
+        server = self.server
+        with server.lock:
+            server.calls += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            self.send_json(503, {'error': 'unavailable'})
+            return True
+        return False
+
+    def do_GET(self):
+        if self.fail():
+            return
+        url = urlparse(self.path)
+        path = url.path.split('/api/v1/', 1)[-1]
+        if path == '~/Session':
+            self.send_json(200, {'session': {'api_token': 'fake_token'}})
+        elif path == '~/Link':
+            form_id = parse_qs(url.query).get('formId', [''])[0]
+            self.send_json(200, {'links': self.server.get_links(form_id)})
+        elif path == '~/Page/all':
+            self.send_json(200, {'pages': [
+                {'id': form_id, 'label': 'Form {}'.format(form_id)} for form_id in self.server.forms]})
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        data = self.read_json()
+        if self.fail():
+            return
+        path = urlparse(self.path).path.split('/api/v1/', 1)[-1]
+        if path == 'auth/ep':
+            self.send_json(200, {}, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=fake;'})
+        elif path == '~/Link/bulk':
+            links = self.server.create_links(
+                str(data['pageId']), [label['text'] for label in data['labels']])
+            self.send_json(200, {'links': links})
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+
+class FakeQuilgoServer(ThreadingMixIn, HTTPServer):
+    """
+    Threaded http server with the links of each form in memory
+    """
+    daemon_threads = True
+
+    def __init__(self, latency=0, error_rate=0, link_count=0, forms=("11223344",), host="127.0.0.1"):
+        HTTPServer.__init__(self, (host, 0), FakeQuilgoHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.forms = list(forms)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.next_id = 1
+        self.links = {}
+        self.thread = None
+        for form_id in self.forms:
+            self.create_links(form_id, ["user{}".format(i) for i in range(link_count)], finished=True)
+
+    @property
+    def url(self):
+        return "http://{}:{}/api/v1".format(*self.server_address[:2])
+
+    def create_links(self, form_id, labels, finished=False):
+        """
+            Add a link by label to the form, finished links have a score
+        """
+        created = []
+        with self.lock:
+            for label in labels:
+                link = {
+                    'id': self.next_id,
+                    'hash': 'hash{}'.format(self.next_id),
+                    'label': label,
+                    'createdAt': datetime.utcnow().isoformat() + 'Z',
+                    'finishedAt': '2020-05-11T15:37:55.000Z' if finished else None,
+                    'score': self.next_id % 10 if finished else None}
+                self.next_id += 1
+                self.links.setdefault(form_id, []).append(link)
+                created.append(link)
+        return created
+
+    def get_links(self, form_id):
+        with self.lock:
+            return list(self.links.get(form_id, []))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
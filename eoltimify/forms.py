@@ -0,0 +1,107 @@
+"""
+Forms of the quilgo account shown in Studio, cached with stale-while-revalidate
+"""
+import json
+import time
+import threading
+import logging
+
+from django.conf import settings as DJANGO_SETTINGS
+from django.core.cache import cache
+
+from . import metrics
+from .auth import get_api_token
+from .client import get_client, QuilgoError, QuilgoRateLimited
+from .utils import cache_single_flight
+
+log = logging.getLogger(__name__)
+
+
+def forms_key():
+    return "eol_timify-forms-{}".format(DJANGO_SETTINGS.TIMIFY_USER)
+
+
+def fetch_forms(user_id=None):
+    """
+        Download all forms of the account,
+        return [{"display_name": ..., "value": ...}] or None on error
+    """
+    try:
+        connectsid, apiKey = get_api_token(user_id)
+        if connectsid is False:
+            log.error("Error with get api token or connect.sid")
+            return None
+        result = get_client().get(
+            "~/Page/all",
+            connectsid=connectsid,
+            apiKey=apiKey)
+    except (QuilgoError, QuilgoRateLimited) as e:
+        log.error("Error in get all Forms, error: {}".format(e))
+        return None
+    if result.status_code != 200:
+        log.error("Error in get all Forms, response: {}".format(result.content))
+        return None
+    data = json.loads(result.text)
+    return [{"display_name": x['label'],
+             "value": str(x['id'])} for x in data['pages']]
+
+
+def fetch_forms_data(user_id=None):
+    """
+        Download the forms, return the cached value {'forms': ..., 'fetched': ...} or None on error
+    """
+    forms = fetch_forms(user_id)
+    if forms is None:
+        return None
+    return {'forms': forms, 'fetched': time.time()}
+
+
+def refresh_forms(user_id=None):
+    """
+        Download the forms and update the cache, return the forms or None on error
+    """
+    data = fetch_forms_data(user_id)
+    if data is None:
+        return None
+    cache.set(forms_key(), data, DJANGO_SETTINGS.EOL_TIMIFY_FORMS_STALE)
+    return data['forms']
+
+
+def _refresh_in_background(user_id):
+    try:
+        refresh_forms(user_id)
+    finally:
+        cache.delete(forms_key() + "-lock")
+
+
+def start_refresh(user_id):
+    """
+        Refresh the forms in a thread, only one refresh at a time for all workers
+    """
+    if cache.add(forms_key() + "-lock", True, DJANGO_SETTINGS.EOL_TIMIFY_FORMS_LOCK_TIMEOUT):
+        thread = threading.Thread(target=_refresh_in_background, args=(user_id,))
+        thread.daemon = True
+        thread.start()
+
+
+def get_forms(user_id=None):
+    """
+        Return the cached forms, after EOL_TIMIFY_FORMS_CACHE seconds the cached
+        forms are still returned while they are refreshed in background.
+        Without cached forms only one worker downloads them, the others wait for it.
+    """
+    data = cache.get(forms_key())
+    if data is None:
+        metrics.incr("cache.forms.miss")
+        data = cache_single_flight(
+            forms_key(),
+            lambda: fetch_forms_data(user_id),
+            DJANGO_SETTINGS.EOL_TIMIFY_FORMS_STALE,
+            DJANGO_SETTINGS.EOL_TIMIFY_FORMS_LOCK_TIMEOUT,
+            DJANGO_SETTINGS.EOL_TIMIFY_FORMS_WAIT)
+        return data['forms'] if data is not None else []
+    metrics.incr("cache.forms.hit")
+    if time.time() - data['fetched'] > DJANGO_SETTINGS.EOL_TIMIFY_FORMS_CACHE:
+        metrics.incr("cache.forms.stale")
+        start_refresh(user_id)
+    return data['forms']
@@ -0,0 +1,347 @@
+"""
+Index of the quilgo links of a form, shared by all workers
+"""
+import json
+import time
+import uuid
+import zlib
+import logging
+
+from django.conf import settings as DJANGO_SETTINGS
+from django.core.cache import cache
+
+from . import metrics
+from .client import get_client, get_backoff, breaker_is_open, QuilgoError
+from .utils import cache_single_flight
+
+log = logging.getLogger(__name__)
+
+
+def link_index_key(id_form):
+    return "eol_timify-links-{}".format(id_form)
+
+
+def link_shard_key(key, version, shard):
+    return "{}-{}-{}".format(key, version, shard)
+
+
+def link_shard(id_link, shards):
+    """
+        Return the shard of the link, the same in every process
+    """
+    return zlib.crc32(str(id_link).encode('utf-8')) % shards
+
+
+def read_link_index(key):
+    """
+        Return the link index saved in the cache by write_link_index,
+        None if the head or one of its shards is missing
+    """
+    head = cache.get(key)
+    if head is None:
+        return None
+    keys = [link_shard_key(key, head['version'], shard) for shard in range(head['shards'])]
+    data = cache.get_many(keys)
+    if len(data) != len(keys):
+        return None
+    index = {}
+    for shard_key in keys:
+        index.update(data[shard_key])
+    return index
+
+
+def read_link(key, id_link):
+    """
+        Return (True, link) reading only the shard of the link of the cached
+        index, link is None if it isn't in the form. (False, None) if the
+        index isn't cached.
+    """
+    head = cache.get(key)
+    if head is None:
+        return False, None
+    shard = cache.get(link_shard_key(key, head['version'], link_shard(id_link, head['shards'])))
+    if shard is None:
+        return False, None
+    metrics.incr("cache.links.hit")
+    return True, shard.get(str(id_link))
+
+
+def write_link_index(key, index, timeout):
+    """
+        Save the link index in shards of about EOL_TIMIFY_LINKS_SHARD_SIZE links,
+        so big forms fit in the item size limit of memcached. The head with the
+        version and number of shards is saved after the shards.
+    """
+    shards = max(1, -(-len(index) // DJANGO_SETTINGS.EOL_TIMIFY_LINKS_SHARD_SIZE))
+    version = uuid.uuid4().hex
+    data = {link_shard_key(key, version, shard): {} for shard in range(shards)}
+    for id_link, link in index.items():
+        data[link_shard_key(key, version, link_shard(id_link, shards))][id_link] = link
+    cache.set_many(data, timeout)
+    cache.set(key, {'version': version, 'shards': shards}, timeout)
+
+
+def fetch_links(id_form, connectsid, apiKey):
+    """
+        Download all links of the form, return the list or None on error
+    """
+    try:
+        result = get_client().get(
+            "~/Link",
+            connectsid=connectsid,
+            apiKey=apiKey,
+            params={'formId': id_form, 'sortBy': 'createdAt'})
+    except QuilgoError as e:
+        log.error("Error get all links of {} form_id, error: {}".format(id_form, e))
+        return None
+    if result.status_code != 200:
+        log.error("Error get all links of {} form_id, response: {}".format(id_form, result.content))
+        return None
+    return json.loads(result.text)["links"]
+
+
+def fetch_link_index(id_form, connectsid, apiKey):
+    """
+        Download all links of the form,
+        return {id_link: {'finishedAt': ..., 'score': ...}} or None on error
+    """
+    links = fetch_links(id_form, connectsid, apiKey)
+    if links is None:
+        return None
+    return {
+        str(link['id']): {
+            'finishedAt': link.get('finishedAt'),
+            'score': link.get('score')
+        } for link in links}
+
+
+def get_link_index(id_form, connectsid, apiKey):
+    """
+        Return the cached link index of the form, at most one
+        worker downloads it per EOL_TIMIFY_LINKS_CACHE window.
+    """
+    return cache_single_flight(
+        link_index_key(id_form),
+        lambda: fetch_link_index(id_form, connectsid, apiKey),
+        DJANGO_SETTINGS.EOL_TIMIFY_LINKS_CACHE,
+        DJANGO_SETTINGS.EOL_TIMIFY_LINKS_LOCK_TIMEOUT,
+        DJANGO_SETTINGS.EOL_TIMIFY_LINKS_WAIT,
+        metric="cache.links",
+        read=read_link_index,
+        write=write_link_index)
+
+
+def refresh_link_index(id_form, connectsid, apiKey):
+    """
+        Download the link index of the form and update the cache
+    """
+    index = fetch_link_index(id_form, connectsid, apiKey)
+    if index is not None:
+        write_link_index(link_index_key(id_form), index, DJANGO_SETTINGS.EOL_TIMIFY_LINKS_CACHE)
+    return index
+
+
+def create_links(id_form, labels, duration, autoclose, connectsid, apiKey):
+    """
+        Create one link per label in the form,
+        return the list of created links or None on error.
+        When the request fails after quilgo may have processed it (timeout or 5xx)
+        the links of the labels created by this call are reused instead of created again,
+        a link created before the call or already saved in EolTimifyLink is never reused.
+    """
+    from django.utils import timezone
+    labels = list(labels)
+    created = []
+    attempt = 0
+    start = timezone.now()
+    while True:
+        parameters = {
+            "labels": [{"text": label} for label in labels],
+            "expiresIn": duration,
+            "forceClose": autoclose == "Si",
+            "pageId": int(id_form)}
+        try:
+            result = get_client().post(
+                "~/Link/bulk",
+                data=json.dumps(parameters),
+                connectsid=connectsid,
+                apiKey=apiKey)
+        except QuilgoError as e:
+            log.error("Error in create link, parameters: {}, error: {}".format(parameters, e))
+            result = None
+        if result is not None and result.status_code == 200:
+            return created + json.loads(result.text)['links']
+        if result is not None:
+            log.error("Error in create link, parameters: {}, response: {}".format(parameters, result.content))
+            if result.status_code < 500:
+                return None
+        if breaker_is_open():
+            return None
+
+        links = fetch_links(id_form, connectsid, apiKey)
+        if links is None:
+            return None
+        existing = get_new_links(links, labels, start)
+        created += existing
+        labels = [label for label in labels if label not in set(link['label'] for link in existing)]
+        attempt += 1
+        if len(labels) == 0:
+            return created
+        if attempt > DJANGO_SETTINGS.EOL_TIMIFY_RETRIES:
+            return None
+        time.sleep(get_backoff(attempt))
+
+
+def get_new_links(links, labels, start):
+    """
+        Return the links of the labels created since start and not saved
+        in EolTimifyLink, one per label
+    """
+    from .models import EolTimifyLink
+    links = [
+        link for link in links
+        if link['label'] in labels and link.get('createdAt') is not None
+        and parse_finished(link['createdAt']) >= start]
+    saved = set(EolTimifyLink.objects.filter(
+        id_link__in=[str(link['id']) for link in links]).values_list('id_link', flat=True))
+    new_links = {}
+    for link in links:
+        if str(link['id']) not in saved:
+            new_links.setdefault(link['label'], link)
+    return list(new_links.values())
+
+
+def parse_finished(finished_at):
+    """
+        Return the finishedAt (or createdAt) of quilgo as datetime or None
+    """
+    from dateutil.parser import parse
+    if finished_at is None:
+        return None
+    return parse(finished_at)
+
+
+def save_links(course_id, usage_key, id_form, links):
+    """
+        Save the index rows of the created links, links is {user_id: link}.
+        The previous link of each student in the block is replaced, a link
+        already saved for another block or student is logged and not saved.
+        Return the saved rows.
+    """
+    from django.db import transaction
+    from .models import EolTimifyLink
+    with transaction.atomic():
+        owned = EolTimifyLink.objects.filter(
+            id_link__in=[str(link['id']) for link in links.values()]
+        ).exclude(usage_key=usage_key, user_id__in=list(links.keys()))
+        owned = set(owned.values_list('id_link', flat=True))
+        rows = []
+        for user_id, link in links.items():
+            if str(link['id']) in owned:
+                log.error("Link {} already saved for another student or block, usage_key: {}, user: {}".format(
+                    link['id'], usage_key, user_id))
+                continue
+            rows.append(EolTimifyLink(
+                course_id=course_id,
+                usage_key=usage_key,
+                user_id=user_id,
+                id_form=id_form,
+                id_link=str(link['id']),
+                hash=link['hash'],
+                label=link['label']))
+        EolTimifyLink.objects.filter(
+            usage_key=usage_key,
+            user_id__in=[row.user_id for row in rows]).delete()
+        EolTimifyLink.objects.bulk_create(rows, batch_size=DJANGO_SETTINGS.EOL_TIMIFY_DB_BATCH_SIZE)
+    return rows
+
+
+def get_link_row(id_link):
+    """
+        Return the EolTimifyLink of the link id or None
+    """
+    from .models import EolTimifyLink
+    try:
+        return EolTimifyLink.objects.get(id_link=str(id_link))
+    except EolTimifyLink.DoesNotExist:
+        return None
+
+
+def is_late(finished_at, expired_date):
+    """
+        Return if the link was finished after the due date, None if it's unknown
+    """
+    if finished_at is None or expired_date is None:
+        return None
+    return finished_at > expired_date
+
+
+def set_link_result(row, finished_at, score, expired_date):
+    """
+        Set the finishedAt and score of the quilgo link in the EolTimifyLink,
+        return True if the row changed
+    """
+    before = (row.finished_at, row.done, row.late, row.score)
+    row.finished_at = parse_finished(finished_at)
+    row.done = row.finished_at is not None
+    row.late = is_late(row.finished_at, expired_date)
+    if score is not None:
+        row.score = str(score)
+    return before != (row.finished_at, row.done, row.late, row.score)
+
+
+def link_lock_key(usage_key, user_id):
+    return "eol_timify-link-lock-{}-{}".format(usage_key, user_id)
+
+
+def provision_key(block_id, user_id, id_form):
+    return "eol_timify-provision-{}-{}-{}".format(block_id, user_id, id_form)
+
+
+def claim_link_creation(block_id, user_id, id_form):
+    """
+        Return True if the link of the student and form isn't being created
+    """
+    return cache.add(
+        provision_key(block_id, user_id, id_form),
+        True,
+        DJANGO_SETTINGS.EOL_TIMIFY_PROVISION_LOCK_TIMEOUT)
+
+
+def release_link_creation(block_id, user_id, id_form):
+    cache.delete(provision_key(block_id, user_id, id_form))
+
+
+def queue_link_creation(block_id, user_id, id_form):
+    """
+        Queue the creation of the link of the student, return False
+        if it was already queued
+    """
+    from .tasks import create_student_link
+    if not claim_link_creation(block_id, user_id, id_form):
+        return False
+    try:
+        create_student_link.delay(block_id, user_id, id_form)
+    except Exception:  # pylint: disable=broad-except
+        release_link_creation(block_id, user_id, id_form)
+        log.exception("Error to queue link creation, block: {}, user: {}".format(block_id, user_id))
+        return False
+    return True
+
+
+def update_link_index(id_form, id_link, finished_at, score):
+    """
+        Update a link in the cached index of the form, if it's cached,
+        a score None keeps the cached score
+    """
+    key = link_index_key(id_form)
+    head = cache.get(key)
+    if head is None:
+        return
+    shard_key = link_shard_key(key, head['version'], link_shard(id_link, head['shards']))
+    shard = cache.get(shard_key)
+    if shard is not None:
+        if score is None:
+            score = shard.get(str(id_link), {}).get('score')
+        shard[str(id_link)] = {'finishedAt': finished_at, 'score': score}
+        cache.set(shard_key, shard, DJANGO_SETTINGS.EOL_TIMIFY_LINKS_CACHE)
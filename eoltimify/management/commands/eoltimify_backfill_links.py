@@ -0,0 +1,110 @@
+"""
+Fill the EolTimifyLink table with the state of the eoltimify StudentModules
+(link, score, finished date, done and late)
+
+    python manage.py lms eoltimify_backfill_links [course_id] --batch-size 500
+"""
+import json
+import logging
+
+from django.conf import settings as DJANGO_SETTINGS
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from eoltimify.links import parse_finished, is_late
+
+log = logging.getLogger(__name__)
+
+
+def get_expired_date(usage_key, expired_dates):
+    """
+        Return the due date of the block, cached in expired_dates by usage_key
+    """
+    from xmodule.modulestore.django import modulestore
+    from xmodule.modulestore.exceptions import ItemNotFoundError
+    if usage_key not in expired_dates:
+        try:
+            expired_dates[usage_key] = modulestore().get_item(usage_key).expired_date()
+        except (ItemNotFoundError, AttributeError):
+            log.error("Block not found, usage_key: {}".format(usage_key))
+            expired_dates[usage_key] = None
+    return expired_dates[usage_key]
+
+
+def state_link_row(student_module, expired_dates):
+    """
+        Return the EolTimifyLink of the state of a StudentModule or None if it has no link
+    """
+    from eoltimify.models import EolTimifyLink
+    try:
+        state = json.loads(student_module.state)
+    except ValueError:
+        log.error("Invalid state, StudentModule: {}".format(student_module.id))
+        return None
+    if not state.get('id_link'):
+        return None
+    finished_at = parse_finished(state.get('expired'))
+    return EolTimifyLink(
+        course_id=student_module.course_id,
+        usage_key=student_module.module_state_key,
+        user_id=student_module.student_id,
+        id_form=state.get('id_form', ''),
+        id_link=str(state['id_link']),
+        hash=state.get('link', ''),
+        label=state.get('name_link', ''),
+        created=student_module.created,
+        finished_at=finished_at,
+        done=finished_at is not None,
+        late=is_late(finished_at, get_expired_date(student_module.module_state_key, expired_dates)),
+        score=state.get('score', 'Sin Registros'),
+        published_score=state.get('published_score'))
+
+
+def backfill_links(course_key=None, batch_size=500):
+    """
+        Create the missing EolTimifyLink rows by chunks of StudentModules,
+        return the number of StudentModules with link
+    """
+    from lms.djangoapps.courseware.models import StudentModule
+    from eoltimify.models import EolTimifyLink
+    student_modules = StudentModule.objects.filter(module_type='eoltimify')
+    if course_key is not None:
+        student_modules = student_modules.filter(course_id=course_key)
+    expired_dates = {}
+    total = 0
+    last_id = 0
+    while True:
+        chunk = list(student_modules.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if len(chunk) == 0:
+            break
+        rows = [state_link_row(student_module, expired_dates) for student_module in chunk]
+        rows = [row for row in rows if row is not None]
+        EolTimifyLink.objects.bulk_create(rows, ignore_conflicts=True)
+        total += len(rows)
+        last_id = chunk[-1].id
+    return total
+
+
+class Command(BaseCommand):
+    help = "Fill the EolTimifyLink table with the state of the eoltimify StudentModules"
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', nargs='?', default=None, help="only the StudentModules of this course")
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DJANGO_SETTINGS.EOL_TIMIFY_DB_BATCH_SIZE,
+            help="number of StudentModules read by query")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be greater than 0")
+        course_key = None
+        if options['course_id'] is not None:
+            try:
+                course_key = CourseKey.from_string(options['course_id'])
+            except InvalidKeyError:
+                raise CommandError("Invalid course id: {}".format(options['course_id']))
+        total = backfill_links(course_key, options['batch_size'])
+        self.stdout.write("{} links saved".format(total))
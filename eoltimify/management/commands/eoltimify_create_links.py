@@ -0,0 +1,101 @@
+"""
+Create in advance the quilgo links of the students of a course or eoltimify block
+
+    python manage.py lms eoltimify_create_links <course_id|block_id> --batch-size 100
+"""
+import logging
+
+from django.conf import settings as DJANGO_SETTINGS
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
+
+from eoltimify.auth import get_api_token
+from eoltimify.client import QuilgoRateLimited
+from eoltimify.links import create_links, save_links
+
+log = logging.getLogger(__name__)
+
+
+def get_blocks(key):
+    """
+        Return the eoltimify blocks of a course id or the block of a usage id
+    """
+    from xmodule.modulestore.django import modulestore
+    try:
+        usage_key = UsageKey.from_string(key)
+        return [modulestore().get_item(usage_key)]
+    except InvalidKeyError:
+        pass
+    try:
+        course_key = CourseKey.from_string(key)
+    except InvalidKeyError:
+        raise CommandError("Invalid course or block id: {}".format(key))
+    return modulestore().get_items(course_key, qualifiers={'category': 'eoltimify'})
+
+
+def create_block_links(block, connectsid, apiKey, batch_size):
+    """
+        Create the links of the active students of the block without a link
+        of the current form, return the number of created links
+    """
+    from django.contrib.auth.models import User
+    from eoltimify.models import EolTimifyLink
+    id_form = block.idform
+    course_key = block.location.course_key
+    students = User.objects.filter(
+        courseenrollment__course_id=course_key,
+        courseenrollment__is_active=1
+    ).order_by('username').values_list('id', 'username')
+    with_link = set(EolTimifyLink.objects.filter(
+        usage_key=block.location,
+        id_form=id_form).values_list('user_id', flat=True))
+    pending = [(student_id, username) for student_id, username in students if student_id not in with_link]
+
+    created = 0
+    for i in range(0, len(pending), batch_size):
+        chunk = pending[i:i + batch_size]
+        try:
+            links = create_links(
+                id_form,
+                [username for student_id, username in chunk],
+                block.duration,
+                block.autoclose,
+                connectsid,
+                apiKey)
+        except QuilgoRateLimited:
+            links = None
+        if links is None:
+            log.error("Error in create links, block: {}, students: {}".format(block.location, chunk))
+            continue
+        links = {link['label']: link for link in links}
+        student_links = {
+            student_id: links[username] for student_id, username in chunk if username in links}
+        created += len(save_links(course_key, block.location, id_form, student_links))
+    return created
+
+
+class Command(BaseCommand):
+    help = "Create the quilgo links of the active students of a course or eoltimify block"
+
+    def add_arguments(self, parser):
+        parser.add_argument('key', help="course id or eoltimify block id")
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DJANGO_SETTINGS.EOL_TIMIFY_BULK_SIZE,
+            help="number of links created by each request to quilgo")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be greater than 0")
+        blocks = [block for block in get_blocks(options['key']) if getattr(block, 'idform', "") != ""]
+        try:
+            connectsid, apiKey = get_api_token()
+        except QuilgoRateLimited:
+            raise CommandError("Quilgo rate limit reached, try again later")
+        if connectsid is False:
+            raise CommandError("Error with get api_key or connect.sid")
+        for block in blocks:
+            created = create_block_links(block, connectsid, apiKey, options['batch_size'])
+            self.stdout.write("{}: {} links created".format(block.location, created))
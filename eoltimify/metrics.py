@@ -0,0 +1,172 @@
+"""
+Metrics of eoltimify: latency and status of the quilgo calls, cache hits and score sync.
+The backend is chosen with EOL_TIMIFY_METRICS: 'noop', 'memory' or 'statsd'.
+"""
+import os
+import time
+import socket
+import threading
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings as DJANGO_SETTINGS
+
+log = logging.getLogger(__name__)
+
+_metrics = None
+_metrics_pid = None
+_metrics_lock = threading.Lock()
+
+
+class NoopMetrics(object):
+    """
+    Discard all metrics
+    """
+
+    def incr(self, name, value=1):
+        pass
+
+    def timing(self, name, ms):
+        pass
+
+    def gauge(self, name, value):
+        pass
+
+
+class MemoryMetrics(object):
+    """
+    Keep the metrics of the process in memory, used by tests and benchmarks
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.timings = {}
+        self.gauges = {}
+
+    def incr(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def timing(self, name, ms):
+        with self.lock:
+            self.timings.setdefault(name, []).append(ms)
+
+    def gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def hit_ratio(self, name):
+        """
+            Return hits / (hits + misses) of a cache or None without calls
+        """
+        hits = self.counters.get(name + ".hit", 0)
+        total = hits + self.counters.get(name + ".miss", 0)
+        if total == 0:
+            return None
+        return float(hits) / total
+
+
+class StatsdMetrics(object):
+    """
+    Send the metrics by UDP to a statsd server, the send errors are ignored
+    """
+
+    def __init__(self, host, port, prefix):
+        try:
+            host = socket.gethostbyname(host)
+        except socket.error as e:
+            log.error("Error to resolve statsd host {}, error: {}".format(host, e))
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, name, value, kind):
+        if self.prefix:
+            name = "{}.{}".format(self.prefix, name)
+        try:
+            self.socket.sendto("{}:{}|{}".format(name, value, kind).encode('utf-8'), self.address)
+        except socket.error:
+            pass
+
+    def incr(self, name, value=1):
+        self.send(name, value, "c")
+
+    def timing(self, name, ms):
+        self.send(name, int(round(ms)), "ms")
+
+    def gauge(self, name, value):
+        self.send(name, value, "g")
+
+
+def create_metrics():
+    """
+        Return the metrics backend of EOL_TIMIFY_METRICS
+    """
+    backend = DJANGO_SETTINGS.EOL_TIMIFY_METRICS
+    if backend == 'statsd':
+        return StatsdMetrics(
+            DJANGO_SETTINGS.EOL_TIMIFY_STATSD_HOST,
+            DJANGO_SETTINGS.EOL_TIMIFY_STATSD_PORT,
+            DJANGO_SETTINGS.EOL_TIMIFY_STATSD_PREFIX)
+    if backend == 'memory':
+        return MemoryMetrics()
+    if backend != 'noop':
+        log.error("Unknown EOL_TIMIFY_METRICS backend: {}".format(backend))
+    return NoopMetrics()
+
+
+def get_metrics():
+    """
+        Return the metrics backend of the current process,
+        a new one is created after a fork.
+    """
+    global _metrics, _metrics_pid
+    pid = os.getpid()
+    if _metrics is None or _metrics_pid != pid:
+        with _metrics_lock:
+            if _metrics is None or _metrics_pid != pid:
+                _metrics = create_metrics()
+                _metrics_pid = pid
+    return _metrics
+
+
+def reset_metrics():
+    """
+        Discard the metrics backend of the current process
+    """
+    global _metrics, _metrics_pid
+    with _metrics_lock:
+        _metrics = None
+        _metrics_pid = None
+
+
+def incr(name, value=1):
+    get_metrics().incr(name, value)
+
+
+def timing(name, ms):
+    get_metrics().timing(name, ms)
+
+
+def gauge(name, value):
+    get_metrics().gauge(name, value)
+
+
+@contextmanager
+def timer(name):
+    """
+        Record the milliseconds spent in the block as a timing
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        timing(name, (time.time() - start) * 1000)
+
+
+def endpoint_name(path):
+    """
+        Return the metric name of a quilgo api path, "~/Link/bulk" is "link_bulk"
+    """
+    return path.lstrip("~/").replace("/", "_").lower()
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eoltimify', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eoltimifylink',
+            name='done',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='eoltimifylink',
+            name='late',
+            field=models.BooleanField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='eoltimifylink',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterIndexTogether(
+            name='eoltimifylink',
+            index_together={('usage_key', 'done'), ('usage_key', 'late')},
+        ),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+from opaque_keys.edx.django.models import CourseKeyField, UsageKeyField
+
+
+class EolTimifyLink(models.Model):
+    """
+    State of a student in an eoltimify block: quilgo link, score, finished date
+    and if it was finished after the due date. Indexed by link id and by block.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    usage_key = UsageKeyField(max_length=255)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    id_form = models.CharField(max_length=50)
+    id_link = models.CharField(max_length=50, unique=True)
+    hash = models.CharField(max_length=255)
+    label = models.CharField(max_length=255)
+    created = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    done = models.BooleanField(default=False, db_index=True)
+    late = models.BooleanField(null=True, blank=True, db_index=True)
+    score = models.CharField(max_length=50, default='Sin Registros')
+    published_score = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [['usage_key', 'user']]
+        index_together = [['usage_key', 'done'], ['usage_key', 'late']]
+
+    def __str__(self):
+        return "{} {} {}".format(self.usage_key, self.user_id, self.id_link)
@@ -0,0 +1,101 @@
+"""
+Results of all eoltimify blocks of a course by student, shown to the staff
+in the course dashboard. The link lists of the forms are downloaded at the
+same time by a bounded pool of threads.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings as DJANGO_SETTINGS
+
+from . import metrics
+from .auth import get_api_token
+from .client import QuilgoRateLimited
+from .links import get_link_index
+
+log = logging.getLogger(__name__)
+
+
+def get_course_blocks(course_key):
+    """
+        Return the eoltimify blocks of the course
+    """
+    from xmodule.modulestore.django import modulestore
+    return modulestore().get_items(course_key, qualifiers={'category': 'eoltimify'})
+
+
+def fetch_link_indexes(id_forms, connectsid, apiKey):
+    """
+        Return the link index of each form, {id_form: index or None},
+        at most EOL_TIMIFY_RESULTS_WORKERS forms are downloaded at a time
+    """
+    def fetch(id_form):
+        try:
+            return get_link_index(id_form, connectsid, apiKey)
+        except QuilgoRateLimited:
+            log.warning("Quilgo rate limit reached in course results, pageId: {}".format(id_form))
+            return None
+
+    if len(id_forms) == 0:
+        return {}
+    workers = min(DJANGO_SETTINGS.EOL_TIMIFY_RESULTS_WORKERS, len(id_forms))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(id_forms, pool.map(fetch, id_forms)))
+
+
+def get_cell(block, row, index):
+    """
+        Return the score of the student in the block, the score of quilgo
+        if the link was finished, otherwise the saved one
+    """
+    if row is None or block.idform == "" or row.id_form != block.idform:
+        return "Sin Registros"
+    link = index.get(row.id_link) if index is not None else None
+    if link is not None and link['finishedAt'] is not None and link['score'] is not None:
+        return str(link['score'])
+    return row.score
+
+
+def get_course_results(course_key, user_id=None):
+    """
+        Return the eoltimify blocks of the course, the enrolled students with
+        their score in each block and the blocks whose form couldn't be read
+    """
+    from django.contrib.auth.models import User
+    from .models import EolTimifyLink
+    with metrics.timer("course_results.duration"):
+        blocks = get_course_blocks(course_key)
+        students = User.objects.filter(
+            courseenrollment__course_id=course_key,
+            courseenrollment__is_active=1
+        ).order_by('username').values('id', 'username', 'email')
+        rows = {
+            (row.usage_key, row.user_id): row
+            for row in EolTimifyLink.objects.filter(course_id=course_key)}
+
+        id_forms = sorted(set(block.idform for block in blocks if block.idform != ""))
+        indexes = {}
+        if len(id_forms) > 0:
+            try:
+                connectsid, apiKey = get_api_token(user_id)
+            except QuilgoRateLimited:
+                log.warning("Quilgo rate limit reached in course results, course: {}".format(course_key))
+                connectsid, apiKey = False, False
+            if connectsid is False:
+                log.error("Error with get api_key or connect.sid, course: {}, user_id: {}".format(course_key, user_id))
+            else:
+                indexes = fetch_link_indexes(id_forms, connectsid, apiKey)
+
+        list_student = []
+        for student in students:
+            scores = [
+                get_cell(block, rows.get((block.location, student['id'])), indexes.get(block.idform))
+                for block in blocks]
+            list_student.append([student['username'], student['email'], scores])
+    errors = [block for block in blocks if block.idform != "" and indexes.get(block.idform) is None]
+    metrics.gauge("course_results.blocks", len(blocks))
+    metrics.gauge("course_results.rows", len(list_student))
+    return {
+        'blocks': blocks,
+        'list_student': list_student,
+        'errors': errors}
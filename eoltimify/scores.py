@@ -0,0 +1,62 @@
+"""
+Snapshot of the score sync of each eoltimify block
+"""
+import logging
+
+from django.conf import settings as DJANGO_SETTINGS
+from django.core.cache import cache
+from django.utils import timezone
+
+log = logging.getLogger(__name__)
+
+
+def scores_key(block_id):
+    return "eol_timify-scores-{}".format(block_id)
+
+
+def get_scores_snapshot(block_id):
+    """
+        Return the last score sync of the block or None
+    """
+    return cache.get(scores_key(block_id))
+
+
+def save_scores_snapshot(block_id, result):
+    """
+        Save the result of a score sync with its timestamp. A failed sync
+        doesn't replace the last successful one, it's saved in 'last_error'.
+    """
+    result = dict(result, timestamp=timezone.now().isoformat())
+    if result['result'] != 'success':
+        previous = get_scores_snapshot(block_id)
+        if previous is not None and previous['result'] == 'success':
+            result = dict(previous, last_error=result['result'])
+    cache.set(scores_key(block_id), result, DJANGO_SETTINGS.EOL_TIMIFY_SCORES_CACHE)
+    return result
+
+
+def claim_scores_sync(block_id):
+    """
+        Return True if there isn't a queued sync of the block
+    """
+    return cache.add(scores_key(block_id) + "-queued", True, DJANGO_SETTINGS.EOL_TIMIFY_SYNC_LOCK_TIMEOUT)
+
+
+def release_scores_sync(block_id):
+    cache.delete(scores_key(block_id) + "-queued")
+
+
+def queue_scores_sync(block_id):
+    """
+        Queue the score sync of the block, return False if it was already queued
+    """
+    from .tasks import sync_block_scores
+    if not claim_scores_sync(block_id):
+        return False
+    try:
+        sync_block_scores.delay(block_id)
+    except Exception:  # pylint: disable=broad-except
+        release_scores_sync(block_id)
+        log.exception("Error to queue score sync, block: {}".format(block_id))
+        return False
+    return True
@@ -1,4 +1,62 @@
-def plugin_settings(settings):
-    settings.TIMIFY_USER = ''
-    settings.TIMIFY_PASSWORD = ''
-    settings.EOL_TIMIFY_TIME_CACHE = 300
\ No newline at end of file
+def plugin_settings(settings):
+    settings.TIMIFY_USER = ''
+    settings.TIMIFY_PASSWORD = ''
+    settings.EOL_TIMIFY_TIME_CACHE = 300
+    settings.EOL_TIMIFY_API_URL = 'https://quilgo.com/api/v1'
+    settings.EOL_TIMIFY_POOL_SIZE = 10
+    settings.EOL_TIMIFY_KEEP_ALIVE = True
+    settings.EOL_TIMIFY_TOKEN_LOCK_TIMEOUT = 30
+    settings.EOL_TIMIFY_TOKEN_WAIT = 5
+    settings.EOL_TIMIFY_LINKS_CACHE = 30
+    settings.EOL_TIMIFY_LINKS_LOCK_TIMEOUT = 30
+    settings.EOL_TIMIFY_LINKS_WAIT = 5
+    settings.EOL_TIMIFY_LINKS_SHARD_SIZE = 2000
+    settings.EOL_TIMIFY_BULK_SIZE = 100
+    settings.EOL_TIMIFY_DB_BATCH_SIZE = 500
+    settings.EOL_TIMIFY_SCORES_CACHE = 172800
+    settings.EOL_TIMIFY_SYNC_LOCK_TIMEOUT = 1800
+    settings.EOL_TIMIFY_SYNC_INTERVAL = 3600
+    settings.EOL_TIMIFY_TIMEOUT = (3.05, 10)
+    settings.EOL_TIMIFY_TIMEOUTS = {
+        '~/Link': (3.05, 20),
+        '~/Link/bulk': (3.05, 20),
+        '~/Page/all': (3.05, 15),
+    }
+    settings.EOL_TIMIFY_BREAKER_FAILURES = 5
+    settings.EOL_TIMIFY_BREAKER_WINDOW = 60
+    settings.EOL_TIMIFY_BREAKER_COOLDOWN = 30
+    settings.EOL_TIMIFY_RETRIES = 2
+    settings.EOL_TIMIFY_RETRY_BACKOFF = 0.5
+    settings.EOL_TIMIFY_RETRY_MAX_BACKOFF = 5
+    settings.EOL_TIMIFY_REQUEST_DEADLINE = 30
+    settings.EOL_TIMIFY_RATE_LIMITS = {
+        'read': (20, 1),
+        'create': (5, 1),
+    }
+    settings.EOL_TIMIFY_RATE_LIMIT_WAIT = 2
+    settings.EOL_TIMIFY_FORMS_CACHE = 300
+    settings.EOL_TIMIFY_FORMS_STALE = 604800
+    settings.EOL_TIMIFY_FORMS_LOCK_TIMEOUT = 60
+    settings.EOL_TIMIFY_FORMS_WAIT = 5
+    settings.EOL_TIMIFY_WEBHOOK_SECRET = ''
+    settings.EOL_TIMIFY_WEBHOOK_GRADES = True
+    settings.EOL_TIMIFY_PROVISION_LOCK_TIMEOUT = 300
+    settings.EOL_TIMIFY_LINK_LOCK_TIMEOUT = 30
+    settings.EOL_TIMIFY_LINK_WAIT = 5
+    settings.EOL_TIMIFY_BATCH_MAX = 50
+    settings.EOL_TIMIFY_RESULTS_WORKERS = 4
+    settings.EOL_TIMIFY_METRICS = 'noop'
+    settings.EOL_TIMIFY_STATSD_HOST = 'localhost'
+    settings.EOL_TIMIFY_STATSD_PORT = 8125
+    settings.EOL_TIMIFY_STATSD_PREFIX = 'eoltimify'
+    set_sync_schedule(settings)
+    settings.EOL_TIMIFY_GRADE_BATCH_SIZE = 100
+
+
+def set_sync_schedule(settings):
+    if not hasattr(settings, 'CELERYBEAT_SCHEDULE'):
+        settings.CELERYBEAT_SCHEDULE = {}
+    settings.CELERYBEAT_SCHEDULE['eoltimify-sync-all-scores'] = {
+        'task': 'eoltimify.tasks.sync_all_scores',
+        'schedule': settings.EOL_TIMIFY_SYNC_INTERVAL,
+    }
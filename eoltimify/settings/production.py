@@ -0,0 +1,9 @@
+from .common import set_sync_schedule
+
+
+def plugin_settings(settings):
+    # production settings are loaded after the common ones,
+    # the schedule is built again with the configured interval
+    settings.EOL_TIMIFY_SYNC_INTERVAL = getattr(settings, 'ENV_TOKENS', {}).get(
+        'EOL_TIMIFY_SYNC_INTERVAL', settings.EOL_TIMIFY_SYNC_INTERVAL)
+    set_sync_schedule(settings)
@@ -8,22 +8,105 @@
 */
 
 
+var EolTimifyStatusBatch = window.EolTimifyStatusBatch || {
+    blocks: {},
+    timer: null,
+    add: function(usage_id, success, fallback){
+        var batch = this
+        batch.blocks[usage_id] = {success: success, fallback: fallback}
+        if (batch.timer === null){
+            batch.timer = setTimeout(function(){ batch.send() }, 0)
+        }
+    },
+    send: function(){
+        var blocks = this.blocks
+        this.blocks = {}
+        this.timer = null
+        window.jQuery.ajax({
+            type: "POST",
+            url: "/eoltimify/status",
+            contentType: "application/json",
+            data: JSON.stringify({'usage_keys': Object.keys(blocks)}),
+            success: function(result){
+                for (var usage_id in blocks){
+                    if (result.blocks && result.blocks[usage_id]){
+                        blocks[usage_id].success(result.blocks[usage_id])
+                    }
+                    else {
+                        blocks[usage_id].fallback()
+                    }
+                }
+            },
+            error: function(){
+                for (var usage_id in blocks){
+                    blocks[usage_id].fallback()
+                }
+            }
+        });
+    }
+};
+window.EolTimifyStatusBatch = EolTimifyStatusBatch;
+
 function EolTimifyXBlock(runtime, element) {
     var $ = window.jQuery;
     var $element = $(element);
     var handlerUrlShowScore = runtime.handlerUrl(element, 'show_score');
+    var handlerUrlRecheck = runtime.handlerUrl(element, 'recheck_done');
+    var handlerUrlStatus = runtime.handlerUrl(element, 'student_status');
+
+    var $student = $element.find('.eoltimify_student[data-pending=true]');
+    var statusPolls = 0;
+    function loadStatus(){
+        statusPolls += 1
+        $.ajax({
+            type: "POST",
+            url: handlerUrlStatus,
+            data: "{}",
+            success: function(result){
+                if (result.result == 'success'){
+                    showStatus(result)
+                }
+                else {
+                    $student.html("Sin Datos</br>")
+                }
+            },
+            error: function(){
+                $student.html('<label id="retry">Hay muchos estudiantes ingresando, actualice la página en un momento</label></br>')
+            }
+        });
+    }
+    function showStatus(result){
+        $student.html(result.html)
+        if (result.provisioning && statusPolls < 20){
+            setTimeout(loadStatus, 3000)
+        }
+    }
+    if ($student.length > 0){
+        // the blocks of the page are loaded with one request to /eoltimify/status,
+        // a block without response is loaded by its own handler
+        EolTimifyStatusBatch.add($student.data('usage-id'), showStatus, loadStatus)
+    }
     
     function showScores(result){
         if (result.result == 'success'){
             var lista = result.list_student
             var table = $element.find('#tabla-alumnos')[0]
+            table.innerHTML = ""
             for(var i = 0; i < lista.length; i+=1){
                 table.innerHTML = table.innerHTML + "<tr><td>"+lista[i][1]+"</td><td>"+lista[i][2]+"</td><td>"+lista[i][3]+"</td><td>"+lista[i][4]+"</td><td>"+lista[i][5]+"</td></tr>"
             };
             $element.find('.eoltimify_scores_instructor')[0].style.visibility = "visible";
+            $element.find('.eoltimify_result_instructor')[0].innerHTML = "Actualizado: " + new Date(result.timestamp).toLocaleString() + ", " + result.updated + " registros actualizados"
+        }
+        if (result.queued){
+            $element.find('.eoltimify_result_instructor')[0].innerHTML += "</br>Los puntajes se están actualizando, presione 'Ver Puntaje' en unos minutos"
+        }
+        else if (result.result == 'queued'){
+            $element.find('.eoltimify_result_instructor')[0].innerHTML = "Ya hay una actualización de puntajes en curso, presione 'Ver Puntaje' en unos minutos"
         }
         $element.find('#timify_loading_ui').hide()
         $element.find('#quilgo_button')[0].disabled = false
+        $element.find('#quilgo_refresh_button')[0].disabled = false
         if (result.result == 'error'){
             $element.find('.eoltimify_error_instructor')[0].innerHTML = "Un error inesperado ha ocurrido, actialice la página e intentelo nuevamente</br>Si el error persiste contactese con el soporte."
         }
@@ -41,4 +124,31 @@ function EolTimifyXBlock(runtime, element) {
             success: showScores
         });        
     });
+    $element.find('input[name=refresh]').click(function (event) {
+        event.currentTarget.disabled = true
+        $element.find('#timify_loading_ui').show()
+        $.ajax({
+            type: "POST",
+            url: handlerUrlShowScore,
+            data: JSON.stringify({'refresh': true}),
+            success: showScores
+        });
+    });
+    $element.find('input[name=recheck]').click(function (event) {
+        event.currentTarget.disabled = true
+        $.ajax({
+            type: "POST",
+            url: handlerUrlRecheck,
+            data: "{}",
+            success: function(result){
+                event.currentTarget.disabled = false
+                if (result.result == 'success'){
+                    $element.find('.eoltimify_result_instructor')[0].innerHTML = "Se verificarán nuevamente " + result.updated + " formularios realizados"
+                }
+                else {
+                    $element.find('.eoltimify_error_instructor')[0].innerHTML = "Un error inesperado ha ocurrido, actialice la página e intentelo nuevamente</br>Si el error persiste contactese con el soporte."
+                }
+            }
+        });
+    });
 }
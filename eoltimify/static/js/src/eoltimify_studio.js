@@ -17,6 +17,7 @@ function EolTimifyXBlock(runtime, element) {
         var data = {
             'display_name': $(element).find('input[name=display_name]').val(),
             'duration': $(element).find('input[name=duration]').val(),
+            'max_points': $(element).find('input[name=max_points]').val(),
             'autoclose': $(element).find('select[name=timifyautoclose]').val(),
             'idform': $(element).find('select[name=timifyform]').val()
         };
@@ -37,6 +38,28 @@ function EolTimifyXBlock(runtime, element) {
         });
     });
     
+    $(element).find('.refresh-forms-eoltimify').bind('click', function(eventObject) {
+        eventObject.preventDefault();
+        var handlerUrl = runtime.handlerUrl(element, 'refresh_idform');
+        var select = $(element).find('select[name=timifyform]');
+        $.post(handlerUrl, JSON.stringify({})).done(function(response) {
+            if (response.result == 'success') {
+                var selected = select.val();
+                select.empty();
+                for (var i = 0; i < response.forms.length; i += 1) {
+                    select.append($('<option>').val(response.forms[i].value).text(response.forms[i].display_name));
+                }
+                select.val(selected);
+            }
+            else {
+                runtime.notify('error',  {
+                    title: 'Error: Falló en actualizar formularios',
+                    message: 'Revise la configuración de la cuenta de Quilgo.'
+                });
+            }
+        });
+    });
+
     $(element).find('.cancel-button-eoltimify').bind('click', function(eventObject) {
         eventObject.preventDefault();
         runtime.notify('cancel', {});
@@ -0,0 +1,152 @@
+"""
+Status of several eoltimify blocks of a student, used by pages with
+more than one block: the EolTimifyLink rows are loaded in one query and
+the link index of each distinct form is requested once.
+"""
+import logging
+
+from . import metrics
+from .auth import get_api_token
+from .client import QuilgoRateLimited
+from .links import get_link_index, set_link_result, queue_link_creation
+
+log = logging.getLogger(__name__)
+
+
+def get_link_rows(user_id, usage_keys):
+    """
+        Return the EolTimifyLink rows of the student in the blocks by usage_key
+    """
+    from .models import EolTimifyLink
+    rows = EolTimifyLink.objects.filter(user_id=user_id, usage_key__in=usage_keys)
+    return {row.usage_key: row for row in rows}
+
+
+def is_pending(block, row):
+    """
+        Return True if the link of the student must be verified in quilgo
+    """
+    return row is not None and row.id_form == block.idform and not row.done
+
+
+def resolve_links(user_id, blocks, rows):
+    """
+        Verify in quilgo the links not done of the student, with one
+        link index per distinct form. On rate limit the links are
+        shown and verified in the next view.
+    """
+    by_form = {}
+    for block in blocks:
+        row = rows.get(block.location)
+        if not block.is_past_due() and is_pending(block, row):
+            by_form.setdefault(row.id_form, []).append((block, row))
+    if len(by_form) == 0:
+        return
+    try:
+        connectsid, apiKey = get_api_token(user_id)
+    except QuilgoRateLimited:
+        log.warning("Quilgo rate limit reached in batch status, user_id: {}".format(user_id))
+        return
+    if connectsid is False:
+        return
+    metrics.gauge("batch_status.forms", len(by_form))
+    for id_form, pending in by_form.items():
+        try:
+            links = get_link_index(id_form, connectsid, apiKey)
+        except QuilgoRateLimited:
+            log.warning("Quilgo rate limit reached in batch status, user_id: {}".format(user_id))
+            return
+        if links is None:
+            log.error("Error get all links of {} form_id, user_id: {}".format(id_form, user_id))
+            continue
+        for block, row in pending:
+            link = links.get(row.id_link)
+            if link is not None and link['finishedAt'] is not None:
+                set_link_result(row, link['finishedAt'], link['score'], block.expired_date())
+                row.save()
+
+
+def is_enrolled(user_id, course_key):
+    """
+        Return True if the student has an active enrollment in the course
+    """
+    from student.models import CourseEnrollment
+    return CourseEnrollment.objects.filter(user_id=user_id, course_id=course_key, is_active=True).exists()
+
+
+def provision_links(user_id, blocks, rows):
+    """
+        Queue the creation of the links the enrolled student doesn't have yet,
+        with CELERY_ALWAYS_EAGER the rows are created in the request.
+    """
+    provisioning = set()
+    enrolled = {}
+    for block in blocks:
+        row = rows.get(block.location)
+        if block.is_past_due() or block.idform == "" or (row is not None and row.id_form == block.idform):
+            continue
+        course_key = block.location.course_key
+        if course_key not in enrolled:
+            enrolled[course_key] = is_enrolled(user_id, course_key)
+        if not enrolled[course_key]:
+            continue
+        queue_link_creation(str(block.location), user_id, block.idform)
+        row = block.get_form_link_row(user_id)
+        if row is None:
+            provisioning.add(block.location)
+        else:
+            rows[block.location] = row
+    return provisioning
+
+
+def get_block_context(block, row, provisioning):
+    """
+        Return the student context of the block, as EolTimifyXBlock.get_context
+    """
+    context = {
+        'xblock': block,
+        'is_course_staff': False,
+        'id_form': block.idform,
+        'timify': False,
+        'expired': False,
+        'score': "None"}
+    if block.is_past_due():
+        context['expired'] = True
+        if row is not None:
+            context['score'] = row.score
+        return context
+    if block.idform == "":
+        return context
+    if block.location in provisioning:
+        context['provisioning'] = True
+        return context
+    if row is None or row.id_form != block.idform:
+        return context
+    context['done'] = row.done
+    return block.set_link_context(context, row)
+
+
+def get_blocks_status(user_id, blocks):
+    """
+        Return the status of the student in each block by usage_key,
+        with the same fields as the student_status handler
+    """
+    with metrics.timer("batch_status.duration"):
+        rows = get_link_rows(user_id, [block.location for block in blocks])
+        provisioning = provision_links(user_id, blocks, rows)
+        resolve_links(user_id, blocks, rows)
+        status = {}
+        for block in blocks:
+            context = get_block_context(block, rows.get(block.location), provisioning)
+            status[str(block.location)] = {
+                'result': 'success',
+                'html': block.render_template('static/html/eoltimify_student.html', context),
+                'timify': context['timify'],
+                'done': context.get('done', False),
+                'retry': False,
+                'provisioning': context.get('provisioning', False),
+                'expired': context['expired'],
+                'link': context.get('link'),
+                'score': context['score']}
+    metrics.gauge("batch_status.blocks", len(blocks))
+    return status
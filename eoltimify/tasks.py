@@ -0,0 +1,69 @@
+"""
+Background tasks of eoltimify
+"""
+import logging
+
+from celery import task
+from django.db.models import Q
+from django.utils import timezone
+from opaque_keys.edx.keys import UsageKey
+
+from .auth import get_api_token
+from .client import QuilgoRateLimited
+from .links import release_link_creation
+from .scores import release_scores_sync, queue_scores_sync
+
+log = logging.getLogger(__name__)
+
+
+@task(queue='edx.lms.core.low')
+def sync_block_scores(block_id):
+    """
+        Sync the scores of an eoltimify block and save its snapshot
+    """
+    from xmodule.modulestore.django import modulestore
+    try:
+        block = modulestore().get_item(UsageKey.from_string(block_id))
+        block.sync_scores()
+    finally:
+        release_scores_sync(block_id)
+
+
+@task(queue='edx.lms.core.low')
+def create_student_link(block_id, user_id, id_form):
+    """
+        Create the quilgo link of a student in an eoltimify block
+    """
+    from xmodule.modulestore.django import modulestore
+    try:
+        block = modulestore().get_item(UsageKey.from_string(block_id))
+        if block.idform != id_form:
+            return
+        if block.get_form_link_row(user_id) is not None:
+            return
+        try:
+            connectsid, apiKey = get_api_token(user_id)
+            if connectsid is False:
+                log.error("Error with get api_key or connect.sid, block: {}, user_id: {}".format(block_id, user_id))
+                return
+            block.create_student_link(user_id, connectsid, apiKey)
+        except QuilgoRateLimited:
+            log.warning("Quilgo rate limit reached in link creation, block: {}, user_id: {}".format(block_id, user_id))
+    finally:
+        release_link_creation(block_id, user_id, id_form)
+
+
+@task(queue='edx.lms.core.low')
+def sync_all_scores():
+    """
+        Queue the score sync of every eoltimify block with form
+        of the courses that haven't ended
+    """
+    from xmodule.modulestore.django import modulestore
+    from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+    courses = CourseOverview.objects.filter(
+        Q(end__isnull=True) | Q(end__gte=timezone.now())).values_list('id', flat=True)
+    for course_key in courses:
+        for block in modulestore().get_items(course_key, qualifiers={'category': 'eoltimify'}):
+            if block.idform != "":
+                queue_scores_sync(str(block.location))
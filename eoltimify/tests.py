@@ -18,6 +18,10 @@ from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
 from xblock.field_data import DictFieldData
 from opaque_keys.edx.locator import CourseLocator
 from .eoltimify import EolTimifyXBlock
+from .auth import reset_api_token, TOKEN_LOCK_KEY
+from .metrics import get_metrics, reset_metrics
+from .scores import scores_key
+from django.core.cache import cache
 from django.test.utils import override_settings
 
 import json
@@ -66,6 +70,38 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
         xblock.category = 'eoltimify'
         return xblock
 
+    def create_link_row(self, user, id_link, score="Sin Registros", finished_at=None,
+                        label="test", id_form="11223344", done=False, usage_key=None):
+        """
+        Create the EolTimifyLink of the user in the xblock
+        """
+        from .models import EolTimifyLink
+        from dateutil.parser import parse
+        return EolTimifyLink.objects.create(
+            course_id=self.course.id,
+            usage_key=usage_key or self.xblock.location,
+            user=user,
+            id_form=id_form,
+            id_link=id_link,
+            hash="testhash",
+            label=label,
+            score=score,
+            finished_at=parse(finished_at) if finished_at is not None else None,
+            done=done)
+
+    def load_student_view(self):
+        """
+        Render the student view and load the status of the student like eoltimify.js
+        """
+        response = self.xblock.student_view()
+        if 'data-pending="true"' not in response.content:
+            return response
+        request = TestRequest()
+        request.method = 'POST'
+        request.body = b'{}'
+        result = json.loads(self.xblock.student_status(request)._app_iter[0].decode())
+        return namedtuple("Response", ["content"])(result['html'])
+
     def setUp(self):
         super(EolTimifyXBlockTestCase, self).setUp()
         """
@@ -74,6 +110,9 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
         self.course = CourseFactory.create(org='foo', course='baz', run='bar')
 
         self.xblock = self.make_an_xblock()
+        reset_api_token()
+        reset_metrics()
+        cache.clear()
 
         with patch('student.models.cc.User.save'):
             # Create the student
@@ -136,7 +175,7 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
         """
         self.xblock.xmodule_runtime.user_is_staff = False
 
-        response = self.xblock.student_view()
+        response = self.load_student_view()
         self.assertTrue('Sin Datos' in response.content)
 
     @override_settings(TIMIFY_USER="")
@@ -157,13 +196,13 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
             state='{}')
         module.save()
 
-        response = self.xblock.student_view()
+        response = self.load_student_view()
         self.assertTrue('Sin Datos' in response.content)
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_student_user_view(self, get, post):
         """
             Test student view normal process
@@ -196,18 +235,19 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
             state='{}')
         module.save()
 
-        response = self.xblock.student_view()
-        state = StudentModule.objects.get(pk=module.id)
+        response = self.load_student_view()
+        from .models import EolTimifyLink
+        row = EolTimifyLink.objects.get(usage_key=self.xblock.location, user=self.student)
         self.assertEqual(
-            json.loads(state.state),
-            json.loads('{"name_link": "test", "id_link": "1", "score": "Sin Registros", "link": "testhash", "id_form": "11223344", "expired": null}'))
+            (row.label, row.id_link, row.score, row.hash, row.id_form, row.finished_at, row.done),
+            ("test", "1", "Sin Registros", "testhash", "11223344", None, False))
         self.assertTrue(
             'href=https://quilgo.com/link/testhash ' in response.content)
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_student_user_view_post_1_400(self, get, post):
         """
             Test student view when get connect.ids fail
@@ -240,14 +280,14 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
             state='{}')
         module.save()
 
-        response = self.xblock.student_view()
+        response = self.load_student_view()
 
         self.assertTrue('Sin Datos' in response.content)
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_student_user_view_post_2_400(self, get, post):
         """
             Test student view when get id form fail
@@ -280,14 +320,14 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
             state='{}')
         module.save()
 
-        response = self.xblock.student_view()
+        response = self.load_student_view()
 
         self.assertTrue('Sin Datos' in response.content)
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_student_user_view_get_1_400(self, get, post):
         """
             Test student view when get api-key fail
@@ -320,19 +360,18 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
             state='{}')
         module.save()
 
-        response = self.xblock.student_view()
+        response = self.load_student_view()
 
         self.assertTrue('Sin Datos' in response.content)
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_student_user_view_with_module_state_finished(self, get, post):
         """
             Test student view when link is already finished
         """
-        from lms.djangoapps.courseware.models import StudentModule
         get.side_effect = [namedtuple("Request",
                                       ["status_code",
                                        "text"])(200,
@@ -362,27 +401,21 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
         self.xblock.xmodule_runtime.user_is_staff = False
         self.xblock.scope_ids.user_id = self.student.id
 
-        module = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.student.id,
-            course_id=self.course.id,
-            state='{"id_link": "1", "score": "2", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": "2020-05-11T15:37:55.000Z"}')
-        module.save()
+        self.create_link_row(self.student, "1", score="2", finished_at="2020-05-11T15:37:55.000Z")
 
-        response = self.xblock.student_view()
+        response = self.load_student_view()
 
         self.assertTrue('<label>Puntaje: 2</label>' in response.content)
         self.assertTrue('id="finished"' in response.content)
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_student_user_view_with_module_state(self, get, post):
         """
             Test student view when student already have student_module
         """
-        from lms.djangoapps.courseware.models import StudentModule
         get.side_effect = [namedtuple("Request",
                                       ["status_code",
                                        "text"])(200,
@@ -412,26 +445,20 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
         self.xblock.xmodule_runtime.user_is_staff = False
         self.xblock.scope_ids.user_id = self.student.id
 
-        module = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.student.id,
-            course_id=self.course.id,
-            state='{"id_link": "1", "score": "Sin Registros", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": null}')
-        module.save()
+        self.create_link_row(self.student, "1")
 
-        response = self.xblock.student_view()
+        response = self.load_student_view()
         self.assertTrue(
             'href=https://quilgo.com/link/testhash ' in response.content)
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_student_user_view_with_different_id_form(self, get, post):
         """
             Test student view when student already have student_module and if form is different
         """
-        from lms.djangoapps.courseware.models import StudentModule
         get.side_effect = [namedtuple("Request",
                                       ["status_code",
                                        "text"])(200,
@@ -461,21 +488,16 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
         self.xblock.xmodule_runtime.user_is_staff = False
         self.xblock.scope_ids.user_id = self.student.id
 
-        module = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.student.id,
-            course_id=self.course.id,
-            state='{"id_link": "1", "score": "Sin Registros", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": null}')
-        module.save()
+        self.create_link_row(self.student, "1")
 
-        response = self.xblock.student_view()
+        response = self.load_student_view()
         self.assertTrue(
             'href=https://quilgo.com/link/testhash ' in response.content)
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_student_user_view_with_false_past_due_form_no_completed(
             self,
             get,
@@ -509,21 +531,20 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
             state='{}')
         module.save()
         with mock.patch('eoltimify.eoltimify.EolTimifyXBlock.is_past_due', return_value=True):
-            response = self.xblock.student_view()
+            response = self.load_student_view()
 
         self.assertTrue('id="expired"' in response.content)
         self.assertTrue('Formulario no realizado' in response.content)
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_student_user_view_with_false_past_due_form_completed(
             self, get, post):
         """
             Test student view when section is finished
         """
-        from lms.djangoapps.courseware.models import StudentModule
         get.side_effect = [namedtuple("Request", ["status_code", "text"])(
             200, json.dumps({"session": {"api_token": "test_token"}}))]
         post.side_effect = [
@@ -543,21 +564,16 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
         self.xblock.xmodule_runtime.user_is_staff = False
         self.xblock.scope_ids.user_id = self.student.id
 
-        module = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.student.id,
-            course_id=self.course.id,
-            state='{"id_link": "1", "score": "2", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": "2020-05-11T15:37:55.000Z"}')
-        module.save()
+        self.create_link_row(self.student, "1", score="2", finished_at="2020-05-11T15:37:55.000Z")
         with mock.patch('eoltimify.eoltimify.EolTimifyXBlock.is_past_due', return_value=True):
-            response = self.xblock.student_view()
+            response = self.load_student_view()
         self.assertTrue('id="expired"' in response.content)
         self.assertTrue('<label>Puntaje: 2</label>' in response.content)
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_staff_user_view_show_score(self, get, post):
         """
             Test staff view normal process
@@ -617,8 +633,8 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_staff_user_view_post_1_400(self, get, post):
         """
             Test staff view when get connect.ids fail
@@ -653,8 +669,8 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_staff_user_view_post_2_400(self, get, post):
         """
             Test staff view when get links from form fail
@@ -678,8 +694,8 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_staff_user_view_get_1_400(self, get, post):
         """
             Test staff view when get api-key fail
@@ -703,8 +719,8 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_staff_user_view_no_links(self, get, post):
         """
             Test staff view when form dont have links
@@ -738,8 +754,8 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_staff_user_view_state_link(self, get, post):
         """
             Test staff view when student have student_module
@@ -781,19 +797,9 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
         data = b'{}'
         request.body = data
 
-        module = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.student.id,
-            course_id=self.course.id,
-            state='{"id_link": "1", "score": "Sin Registros", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": "2020-05-11T15:37:55.000Z"}')
-        module.save()
+        self.create_link_row(self.student, "1", finished_at="2020-05-11T15:37:55.000Z")
 
-        module2 = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.staff_user.id,
-            course_id=self.course.id,
-            state='{"id_link": "2", "score": "Sin Registros", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": null}')
-        module2.save()
+        self.create_link_row(self.staff_user, "2")
 
         response = self.xblock.show_score(request)
         data = json.loads(response._app_iter[0].decode())
@@ -811,16 +817,20 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
                          'Sin Registros']]
         self.assertEqual(data["list_student"], list_student)
         self.assertEqual(data["result"], "success")
+        self.assertEqual(data["updated"], 1)
+        from .models import EolTimifyLink
+        row = EolTimifyLink.objects.get(id_link="1")
+        self.assertEqual(row.score, '1')
+        self.assertTrue(row.done)
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_staff_user_view_state_no_link(self, get, post):
         """
             Test staff view when link from student molude no exists in link from form
         """
-        from lms.djangoapps.courseware.models import StudentModule
         request = TestRequest()
         request.method = 'POST'
 
@@ -857,19 +867,9 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
         data = b'{}'
         request.body = data
 
-        module = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.student.id,
-            course_id=self.course.id,
-            state='{"id_link": "1", "score": "Sin Registros", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": null}')
-        module.save()
+        self.create_link_row(self.student, "1")
 
-        module2 = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.staff_user.id,
-            course_id=self.course.id,
-            state='{"id_link": "5", "score": "Sin Registros", "link": "testhash", "name_link": "test", "id_form": "11223344"}')
-        module2.save()
+        self.create_link_row(self.staff_user, "5")
 
         response = self.xblock.show_score(request)
         data = json.loads(response._app_iter[0].decode())
@@ -890,13 +890,12 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_staff_user_view_with_datetime(self, get, post):
         """
             Test staff view when section have finished date time
         """
-        from lms.djangoapps.courseware.models import StudentModule
         request = TestRequest()
         request.method = 'POST'
 
@@ -933,19 +932,9 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
         data = b'{}'
         request.body = data
 
-        module = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.student.id,
-            course_id=self.course.id,
-            state='{"id_link": "1", "score": "Sin Registros", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": "2020-05-11T15:37:55.000Z"}')
-        module.save()
+        self.create_link_row(self.student, "1", finished_at="2020-05-11T15:37:55.000Z")
 
-        module2 = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.staff_user.id,
-            course_id=self.course.id,
-            state='{"id_link": "2", "score": "Sin Registros", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": null}')
-        module2.save()
+        self.create_link_row(self.staff_user, "2")
         from dateutil.parser import parse
         with mock.patch('eoltimify.eoltimify.EolTimifyXBlock.expired_date', return_value=parse("2020-05-11T15:38:55.000Z")):
             response = self.xblock.show_score(request)
@@ -968,13 +957,12 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
 
     @override_settings(TIMIFY_USER="test")
     @override_settings(TIMIFY_PASSWORD="test")
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_staff_user_view_with_datetime_late(self, get, post):
         """
             Test staff view when finished datetime section is already finished
         """
-        from lms.djangoapps.courseware.models import StudentModule
         request = TestRequest()
         request.method = 'POST'
 
@@ -1011,19 +999,9 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
         data = b'{}'
         request.body = data
 
-        module = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.student.id,
-            course_id=self.course.id,
-            state='{"id_link": "1", "score": "Sin Registros", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": "2020-05-11T15:37:55.000Z"}')
-        module.save()
+        self.create_link_row(self.student, "1", finished_at="2020-05-11T15:37:55.000Z")
 
-        module2 = StudentModule(
-            module_state_key=self.xblock.location,
-            student_id=self.staff_user.id,
-            course_id=self.course.id,
-            state='{"id_link": "2", "score": "Sin Registros", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": null}')
-        module2.save()
+        self.create_link_row(self.staff_user, "2")
         from dateutil.parser import parse
         with mock.patch('eoltimify.eoltimify.EolTimifyXBlock.expired_date', return_value=parse("2020-05-11T15:36:55.000Z")):
             response = self.xblock.show_score(request)
@@ -1043,3 +1021,1188 @@ class EolTimifyXBlockTestCase(UrlResetMixin, ModuleStoreTestCase):
                          'Si']]
         self.assertEqual(data["list_student"], list_student)
         self.assertEqual(data["result"], "success")
+
+    def test_quilgo_client_reused(self):
+        """
+            Test the same pooled client is returned in the process
+        """
+        from .client import get_client
+        self.assertIs(get_client(), get_client())
+
+    @patch('requests.Session.get')
+    def test_quilgo_client_auth(self, get):
+        """
+            Test connect.sid and api-key are sent on each request
+        """
+        from .client import QuilgoClient
+        client = QuilgoClient(pool_size=2)
+        client.get("~/Link", connectsid="sid", apiKey="key", params={'formId': '1'})
+        get.assert_called_once_with(
+            "https://quilgo.com/api/v1/~/Link",
+            timeout=(3.05, 20),
+            params={'formId': '1'},
+            cookies={'connect.sid': 'sid'},
+            headers={'x-api-key': 'key'})
+        self.assertEqual(client.session.headers['content-type'], 'application/json')
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_api_token_shared_between_courses(self, get, post):
+        """
+            Test the login is done once for all courses
+        """
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+            200, json.dumps({"session": {"api_token": "test_token"}}))]
+        post.side_effect = [namedtuple("Request", ["status_code", "headers"])(
+            200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'})]
+        other_course = CourseFactory.create(org='foo', course='baz2', run='bar')
+        other_xblock = self.make_an_xblock()
+        other_xblock.course_id = other_course.id
+
+        self.assertEqual(self.xblock.get_api_token(), ('test', 'test_token'))
+        reset_api_token()
+        self.assertEqual(other_xblock.get_api_token(), ('test', 'test_token'))
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(get.call_count, 1)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @override_settings(EOL_TIMIFY_TOKEN_WAIT=0.2)
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_api_token_login_in_progress(self, get, post):
+        """
+            Test a worker doesnt login while other worker holds the lock
+        """
+        cache.set(TOKEN_LOCK_KEY, True, 30)
+        self.assertEqual(self.xblock.get_api_token(), (False, False))
+        self.assertFalse(post.called)
+        self.assertFalse(get.called)
+        cache.delete(TOKEN_LOCK_KEY)
+
+    @patch('requests.Session.get')
+    def test_get_link_status_index_cached(self, get):
+        """
+            Test the link list of the form is downloaded once for many students
+        """
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+            200, json.dumps({"links": [{"id": 1, "score": 3, "finishedAt": "2020-05-11T15:37:55.000Z"},
+                                       {"id": 2, "score": None, "finishedAt": None}]}))]
+        self.xblock.idform = "11223344"
+        self.assertEqual(
+            self.xblock.get_link_status("1", "test", "test_token"),
+            {"finishedAt": "2020-05-11T15:37:55.000Z", "score": 3})
+        self.assertEqual(
+            self.xblock.get_link_status("2", "test", "test_token"),
+            {"finishedAt": None, "score": None})
+        self.assertIsNone(self.xblock.get_link_status("3", "test", "test_token"))
+        self.assertEqual(get.call_count, 1)
+
+    @patch('requests.Session.get')
+    def test_get_link_status_index_error(self, get):
+        """
+            Test errors downloading the link list are not cached
+        """
+        get.side_effect = [
+            namedtuple("Request", ["status_code", "text", "content"])(400, '', 'error'),
+            namedtuple("Request", ["status_code", "text"])(
+                200, json.dumps({"links": [{"id": 1, "score": 3, "finishedAt": "2020-05-11T15:37:55.000Z"}]}))]
+        self.xblock.idform = "11223344"
+        self.assertIsNone(self.xblock.get_link_status("1", "test", "test_token"))
+        self.assertEqual(self.xblock.get_link_status("1", "test", "test_token")["score"], 3)
+        self.assertEqual(get.call_count, 2)
+
+    @override_settings(EOL_TIMIFY_LINKS_SHARD_SIZE=2)
+    @patch('requests.Session.get')
+    def test_link_index_shards(self, get):
+        """
+            Test the link index of a big form is saved in shards and read from them
+        """
+        from .links import get_link_index, link_index_key, read_link_index, update_link_index
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+            200, json.dumps({"links": [{"id": i, "score": None, "finishedAt": None} for i in range(5)]}))]
+        index = get_link_index("11223344", "test", "test_token")
+        self.assertEqual(sorted(index.keys()), ["0", "1", "2", "3", "4"])
+        head = cache.get(link_index_key("11223344"))
+        self.assertEqual(head['shards'], 3)
+
+        update_link_index("11223344", "3", "2020-05-11T15:37:55.000Z", 4)
+        self.assertEqual(get_link_index("11223344", "test", "test_token")["3"]["score"], 4)
+        self.assertEqual(get.call_count, 1)
+
+        # a student view reads only the shard of its link
+        self.xblock.idform = "11223344"
+        with patch('eoltimify.links.cache.get_many') as get_many:
+            self.assertEqual(self.xblock.get_link_status("3", "test", "test_token")["score"], 4)
+            self.assertIsNone(self.xblock.get_link_status("9", "test", "test_token"))
+            self.assertFalse(get_many.called)
+        self.assertEqual(get.call_count, 1)
+
+        cache.delete("{}-{}-0".format(link_index_key("11223344"), head['version']))
+        self.assertIsNone(read_link_index(link_index_key("11223344")))
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_student_user_view_done_saved(self, get, post):
+        """
+            Test the done status is saved in the student state
+        """
+        from lms.djangoapps.courseware.models import StudentModule
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+                               200, json.dumps({"session": {"api_token": "test_token"}})),
+                           namedtuple("Request", ["status_code", "text"])(
+                               200, json.dumps({"links": [{"id": 1, "score": 5, "finishedAt": "2020-05-11T15:37:55.000Z"}]}))]
+        post.side_effect = [namedtuple("Request", ["status_code", "headers"])(
+            200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'})]
+        self.xblock.idform = "11223344"
+        self.xblock.xmodule_runtime.user_is_staff = False
+        self.xblock.scope_ids.user_id = self.student.id
+        self.create_link_row(self.student, "1")
+
+        response = self.load_student_view()
+        from .models import EolTimifyLink
+        row = EolTimifyLink.objects.get(id_link="1")
+        self.assertTrue('<label>Puntaje: 5</label>' in response.content)
+        self.assertTrue(row.done)
+        self.assertEqual(row.score, '5')
+        self.assertEqual(row.finished_at.isoformat(), "2020-05-11T15:37:55+00:00")
+
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_student_user_view_done_no_request(self, get, post):
+        """
+            Test quilgo is not called when the student state is done
+        """
+        self.xblock.idform = "11223344"
+        self.xblock.xmodule_runtime.user_is_staff = False
+        self.xblock.scope_ids.user_id = self.student.id
+        self.create_link_row(self.student, "1", score="5", finished_at="2020-05-11T15:37:55.000Z", done=True)
+
+        response = self.load_student_view()
+        self.assertTrue('id="finished"' in response.content)
+        self.assertTrue('<label>Puntaje: 5</label>' in response.content)
+        self.assertFalse(get.called)
+        self.assertFalse(post.called)
+
+    def test_recheck_done(self):
+        """
+            Test staff can clear the done status of the students
+        """
+        from lms.djangoapps.courseware.models import StudentModule
+        request = TestRequest()
+        request.method = 'POST'
+        request.body = json.dumps({'student_id': self.student.id}).encode()
+        self.xblock.xmodule_runtime.user_is_staff = True
+        self.xblock.scope_ids.user_id = self.staff_user.id
+        self.create_link_row(self.student, "1", score="5", finished_at="2020-05-11T15:37:55.000Z", done=True)
+
+        response = self.xblock.recheck_done(request)
+        data = json.loads(response._app_iter[0].decode())
+        self.assertEqual(data, {'result': 'success', 'updated': 1})
+        from .models import EolTimifyLink
+        self.assertFalse(EolTimifyLink.objects.get(id_link="1").done)
+
+    def test_recheck_done_student(self):
+        """
+            Test students can't clear the done status
+        """
+        request = TestRequest()
+        request.method = 'POST'
+        request.body = b'{}'
+        self.xblock.xmodule_runtime.user_is_staff = False
+        self.xblock.scope_ids.user_id = self.student.id
+        response = self.xblock.recheck_done(request)
+        data = json.loads(response._app_iter[0].decode())
+        self.assertEqual(data["result"], "error")
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_command_create_links(self, get, post):
+        """
+            Test the links of all students are created by the command
+        """
+        from django.core.management import call_command
+        from .models import EolTimifyLink
+        block = ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            idform='11223344')
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+            200, json.dumps({"session": {"api_token": "test_token"}}))]
+        post.side_effect = [
+            namedtuple("Request", ["status_code", "headers"])(
+                200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'}),
+            namedtuple("Request", ["status_code", "text"])(
+                200, json.dumps({"links": [{"id": 1, "hash": "hash1", "label": "staff_user"}]})),
+            namedtuple("Request", ["status_code", "text"])(
+                200, json.dumps({"links": [{"id": 2, "hash": "hash2", "label": "student"}]}))]
+        self.create_link_row(self.student, "3", id_form="55667788", usage_key=block.location)
+
+        call_command('eoltimify_create_links', str(self.course.id), '--batch-size', '1')
+        call_command('eoltimify_create_links', str(block.location))
+
+        self.assertEqual(post.call_count, 3)
+        row = EolTimifyLink.objects.get(usage_key=block.location, user=self.staff_user)
+        self.assertEqual(
+            (row.label, row.id_link, row.score, row.hash, row.id_form, row.done),
+            ("staff_user", "1", "Sin Registros", "hash1", "11223344", False))
+        self.assertFalse(EolTimifyLink.objects.filter(id_link="3").exists())
+        row = EolTimifyLink.objects.get(id_link="2")
+        self.assertEqual((row.user_id, row.usage_key, row.hash), (self.student.id, block.location, "hash2"))
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @override_settings(EOL_TIMIFY_RATE_LIMITS={'read': (0, 60)})
+    @override_settings(EOL_TIMIFY_RATE_LIMIT_WAIT=0)
+    @patch('requests.Session.post')
+    def test_command_create_links_rate_limited(self, post):
+        """
+            Test the command fails with an error when there are no tokens to call quilgo
+        """
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            idform='11223344')
+        with self.assertRaises(CommandError):
+            call_command('eoltimify_create_links', str(self.course.id))
+        self.assertFalse(post.called)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_staff_user_view_no_student_module_created(self, get, post):
+        """
+            Test show_score doesn't create student modules of students without link
+        """
+        from lms.djangoapps.courseware.models import StudentModule
+        request = TestRequest()
+        request.method = 'POST'
+        request.body = b'{}'
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+                               200, json.dumps({"session": {"api_token": "test_token"}})),
+                           namedtuple("Request", ["status_code", "text"])(
+                               200, json.dumps({"links": [{"id": 1, "score": "1", "finishedAt": None}]}))]
+        post.side_effect = [namedtuple("Request", ["status_code", "headers"])(
+            200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'})]
+        self.xblock.idform = "11223344"
+        self.xblock.xmodule_runtime.user_is_staff = True
+        self.xblock.scope_ids.user_id = self.staff_user.id
+
+        response = self.xblock.show_score(request)
+        data = json.loads(response._app_iter[0].decode())
+        self.assertEqual(data["result"], "success")
+        self.assertEqual(data["list_student"][1], [self.student.id, 'student', 'student@edx.org', 'Sin Registros', 'Sin Registros', 'Sin Registros'])
+        self.assertFalse(StudentModule.objects.filter(module_state_key=self.xblock.location).exists())
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_staff_user_view_show_score_snapshot(self, get, post):
+        """
+            Test show_score returns the saved snapshot without calling quilgo
+        """
+        request = TestRequest()
+        request.method = 'POST'
+        request.body = b'{}'
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+                               200, json.dumps({"session": {"api_token": "test_token"}})),
+                           namedtuple("Request", ["status_code", "text"])(
+                               200, json.dumps({"links": [{"id": 1, "score": "1", "finishedAt": None}]}))]
+        post.side_effect = [namedtuple("Request", ["status_code", "headers"])(
+            200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'})]
+        self.xblock.idform = "11223344"
+        self.xblock.xmodule_runtime.user_is_staff = True
+        self.xblock.scope_ids.user_id = self.staff_user.id
+
+        response = self.xblock.show_score(request)
+        first = json.loads(response._app_iter[0].decode())
+        response = self.xblock.show_score(request)
+        second = json.loads(response._app_iter[0].decode())
+        self.assertEqual(first["result"], "success")
+        self.assertEqual(first, second)
+        self.assertTrue('timestamp' in second)
+        self.assertEqual(get.call_count, 2)
+        # only the metadata of the sync is cached, the list is read from the rows
+        self.assertNotIn('list_student', cache.get(scores_key(self.xblock.block_id)))
+
+    @override_settings(CELERY_ALWAYS_EAGER=False)
+    @patch('eoltimify.tasks.sync_block_scores.delay')
+    def test_show_score_student(self, delay):
+        """
+            Test students can't see the scores or queue a sync
+        """
+        request = TestRequest()
+        request.method = 'POST'
+        request.body = b'{"refresh": true}'
+        self.xblock.idform = "11223344"
+        self.xblock.xmodule_runtime.user_is_staff = False
+        self.xblock.scope_ids.user_id = self.student.id
+
+        response = self.xblock.show_score(request)
+        data = json.loads(response._app_iter[0].decode())
+        self.assertEqual(data, {'result': 'error'})
+        self.assertFalse(delay.called)
+
+    @override_settings(CELERY_ALWAYS_EAGER=False)
+    @patch('eoltimify.tasks.sync_block_scores.delay')
+    def test_staff_user_view_show_score_queued(self, delay):
+        """
+            Test show_score queues the sync when there isn't a snapshot
+        """
+        request = TestRequest()
+        request.method = 'POST'
+        request.body = b'{"refresh": true}'
+        self.xblock.idform = "11223344"
+        self.xblock.xmodule_runtime.user_is_staff = True
+        self.xblock.scope_ids.user_id = self.staff_user.id
+
+        response = self.xblock.show_score(request)
+        data = json.loads(response._app_iter[0].decode())
+        self.assertEqual(data, {'result': 'queued', 'queued': True})
+        response = self.xblock.show_score(request)
+        data = json.loads(response._app_iter[0].decode())
+        self.assertEqual(data, {'result': 'queued', 'queued': False})
+        delay.assert_called_once_with(self.xblock.block_id)
+
+    @override_settings(EOL_TIMIFY_DB_BATCH_SIZE=1)
+    def test_export_csv(self):
+        """
+            Test the csv export streams all students, without the
+            score of a link of another form
+        """
+        from .views import export_csv
+        block = ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            idform='11223344')
+        self.create_link_row(self.student, "1", score="5", usage_key=block.location)
+        self.create_link_row(self.staff_user, "2", score="7", id_form="55667788", usage_key=block.location)
+
+        request = RequestFactory().get('/eoltimify/csv/{}'.format(block.location))
+        request.user = self.staff_user
+        response = export_csv(request, str(block.location))
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertTrue(response.streaming)
+        rows = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(rows[0], 'Username,Correo,Nombre Test,Puntaje,Atrasado')
+        self.assertEqual(len(rows), 3)
+        self.assertTrue('student,student@edx.org,test,5,Sin Registros' in rows)
+        self.assertTrue('staff_user,staff@edx.org,test,Sin Registros,Sin Registros' in rows)
+
+    def test_export_csv_student(self):
+        """
+            Test students can't download the csv
+        """
+        from .views import export_csv
+        request = RequestFactory().get('/eoltimify/csv/{}'.format(self.xblock.location))
+        request.user = self.student
+        response = export_csv(request, str(self.xblock.location))
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('lms.djangoapps.grades.signals.signals.SCORE_PUBLISHED.send')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_staff_user_view_publish_grade(self, get, post, score_published):
+        """
+            Test the scores are published once in the gradebook
+        """
+        request = TestRequest()
+        request.method = 'POST'
+        request.body = b'{"refresh": true}'
+        links = namedtuple("Request", ["status_code", "text"])(
+            200, json.dumps({"links": [{"id": 1, "score": "8", "finishedAt": "2020-05-11T15:37:55.000Z"}]}))
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+                               200, json.dumps({"session": {"api_token": "test_token"}})),
+                           links,
+                           links]
+        post.side_effect = [namedtuple("Request", ["status_code", "headers"])(
+            200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'})]
+        self.xblock.idform = "11223344"
+        self.xblock.max_points = 10
+        self.xblock.xmodule_runtime.user_is_staff = True
+        self.xblock.scope_ids.user_id = self.staff_user.id
+        self.create_link_row(self.student, "1")
+
+        self.xblock.show_score(request)
+        self.xblock.show_score(request)
+        score_published.assert_called_once_with(
+            sender=None,
+            block=self.xblock,
+            user=self.student,
+            raw_earned=8.0,
+            raw_possible=10,
+            only_if_higher=False,
+            score_deleted=False)
+        from .models import EolTimifyLink
+        self.assertEqual(EolTimifyLink.objects.get(id_link="1").published_score, 8.0)
+
+    @patch('eoltimify.eoltimify.log.error')
+    def test_get_grade(self, log_error):
+        """
+            Test the scores above max_points are not published
+        """
+        self.xblock.max_points = 10
+        self.assertEqual(self.xblock.get_grade("8"), 8.0)
+        self.assertEqual(self.xblock.get_grade("10"), 10.0)
+        self.assertIsNone(self.xblock.get_grade("Sin Registros"))
+        self.assertFalse(log_error.called)
+        self.assertIsNone(self.xblock.get_grade("12"))
+        self.assertTrue(log_error.called)
+        self.xblock.max_points = 0
+        self.assertIsNone(self.xblock.get_grade("8"))
+
+    @override_settings(EOL_TIMIFY_GRADE_BATCH_SIZE=1)
+    @patch('lms.djangoapps.grades.signals.signals.SCORE_PUBLISHED.send')
+    def test_publish_grades_error(self, score_published):
+        """
+            Test the grades not sent are not saved as published
+        """
+        from .models import EolTimifyLink
+        self.xblock.max_points = 10
+        self.create_link_row(self.student, "1")
+        self.create_link_row(self.staff_user, "2")
+        score_published.side_effect = [None, Exception("error")]
+        with self.assertRaises(Exception):
+            self.xblock.publish_grades([(self.student.id, 5.0), (self.staff_user.id, 7.0)])
+        self.assertEqual(EolTimifyLink.objects.get(id_link="1").published_score, 5.0)
+        self.assertIsNone(EolTimifyLink.objects.get(id_link="2").published_score)
+
+    @override_settings(EOL_TIMIFY_BREAKER_FAILURES=2)
+    @patch('eoltimify.client.time.sleep')
+    @patch('requests.Session.get')
+    def test_quilgo_client_circuit_breaker(self, get, sleep):
+        """
+            Test quilgo is not called after repeated failures
+        """
+        import requests
+        from .client import QuilgoClient, QuilgoError
+        get.side_effect = requests.Timeout("timeout")
+        client = QuilgoClient()
+        for i in range(3):
+            with self.assertRaises(QuilgoError):
+                client.get("~/Session")
+        self.assertEqual(get.call_count, 2)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('requests.Session.post')
+    def test_student_user_view_timeout(self, post):
+        """
+            Test student view when quilgo doesn't answer
+        """
+        import requests
+        post.side_effect = requests.Timeout("timeout")
+        self.xblock.idform = "11223344"
+        self.xblock.xmodule_runtime.user_is_staff = False
+        self.xblock.scope_ids.user_id = self.student.id
+
+        response = self.load_student_view()
+        self.assertTrue('Sin Datos' in response.content)
+
+    @patch('eoltimify.client.time.sleep')
+    @patch('requests.Session.get')
+    def test_quilgo_client_retry_after(self, get, sleep):
+        """
+            Test GET requests are retried honoring Retry-After
+        """
+        from .client import QuilgoClient
+        get.side_effect = [
+            namedtuple("Request", ["status_code", "headers", "content"])(429, {'Retry-After': '2'}, 'error'),
+            namedtuple("Request", ["status_code", "headers", "content"])(503, {}, 'error'),
+            namedtuple("Request", ["status_code", "headers", "text"])(200, {}, '{}')]
+        result = QuilgoClient().get("~/Session")
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(get.call_count, 3)
+        self.assertEqual(sleep.call_args_list[0], mock.call(2.0))
+
+    @patch('requests.Session.get')
+    def test_quilgo_client_deadline(self, get):
+        """
+            Test the timeout of each attempt ends at the deadline of the request
+        """
+        from .client import QuilgoClient, QuilgoError, get_timeout
+        self.assertEqual(get_timeout("~/Link"), (3.05, 20))
+        self.assertEqual(get_timeout("~/Link", 5), (3.05, 5))
+        self.assertEqual(get_timeout("~/Link", 1), (1, 1))
+        with override_settings(EOL_TIMIFY_REQUEST_DEADLINE=0):
+            with self.assertRaises(QuilgoError):
+                QuilgoClient().get("~/Link")
+        self.assertFalse(get.called)
+
+    @patch('eoltimify.client.time.sleep')
+    @patch('requests.Session.post')
+    def test_quilgo_client_post_not_retried(self, post, sleep):
+        """
+            Test POST requests are not retried when quilgo may have processed them
+        """
+        from .client import QuilgoClient
+        post.side_effect = [
+            namedtuple("Request", ["status_code", "headers", "content"])(502, {}, 'error'),
+            namedtuple("Request", ["status_code", "headers", "text"])(200, {}, '{}')]
+        result = QuilgoClient().post("~/Link/bulk", data='{}')
+        self.assertEqual(result.status_code, 502)
+        self.assertEqual(post.call_count, 1)
+
+    @patch('django.utils.timezone.now')
+    @patch('eoltimify.links.time.sleep')
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    def test_create_links_idempotency_guard(self, post, get, sleep, now):
+        """
+            Test links created by a failed request are not created again,
+            without reusing older or saved links of the same label
+        """
+        import requests
+        from dateutil.parser import parse
+        from .links import create_links
+        now.return_value = parse("2020-05-11T15:00:00.000Z")
+        self.create_link_row(self.student, "4", label="student2")
+        post.side_effect = [
+            requests.ReadTimeout("timeout"),
+            namedtuple("Request", ["status_code", "text"])(
+                200, json.dumps({"links": [{"id": 2, "hash": "hash2", "label": "student2"}]}))]
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+            200, json.dumps({"links": [
+                {"id": 3, "hash": "hash3", "label": "student1", "finishedAt": None,
+                 "createdAt": "2020-05-10T15:00:00.000Z"},
+                {"id": 4, "hash": "hash4", "label": "student2", "finishedAt": None,
+                 "createdAt": "2020-05-11T15:00:01.000Z"},
+                {"id": 1, "hash": "hash1", "label": "student1", "finishedAt": None,
+                 "createdAt": "2020-05-11T15:00:01.000Z"}]}))]
+
+        links = create_links("11223344", ["student1", "student2"], 120, "Si", "test", "test_token")
+        self.assertEqual([link['id'] for link in links], [1, 2])
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(json.loads(post.call_args[1]['data'])['labels'], [{"text": "student2"}])
+
+    @patch('eoltimify.links.log.error')
+    def test_save_links(self, log_error):
+        """
+            Test the link of a student is replaced without deleting
+            the rows of other students or blocks
+        """
+        from .links import save_links
+        from .models import EolTimifyLink
+        self.create_link_row(self.student, "1")
+        self.create_link_row(self.staff_user, "2")
+        rows = save_links(self.course.id, self.xblock.location, "11223344", {
+            self.student.id: {"id": 3, "hash": "hash3", "label": "student"}})
+        self.assertEqual([row.id_link for row in rows], ["3"])
+        self.assertEqual(EolTimifyLink.objects.get(user=self.student).id_link, "3")
+        self.assertFalse(log_error.called)
+
+        rows = save_links(self.course.id, self.xblock.location, "11223344", {
+            self.student.id: {"id": 2, "hash": "hash2", "label": "student"}})
+        self.assertEqual(rows, [])
+        self.assertTrue(log_error.called)
+        self.assertEqual(EolTimifyLink.objects.get(user=self.student).id_link, "3")
+        self.assertEqual(EolTimifyLink.objects.get(user=self.staff_user).id_link, "2")
+
+    @override_settings(EOL_TIMIFY_RATE_LIMITS={'read': (2, 60)})
+    def test_rate_limit_bucket(self):
+        """
+            Test the tokens of the bucket are shared and limited
+        """
+        from .client import acquire_token
+        self.assertTrue(acquire_token('read', wait=0))
+        self.assertTrue(acquire_token('read', wait=0))
+        self.assertFalse(acquire_token('read', wait=0))
+        self.assertTrue(acquire_token('create', wait=0))
+
+    @override_settings(EOL_TIMIFY_RATE_LIMITS={'read': (2, 60)})
+    def test_rate_limit_bucket_refill(self):
+        """
+            Test the bucket is refilled by the time since the last call, without a window burst
+        """
+        import time
+        from .client import acquire_token
+        cache.set("eol_timify-rate-read", {'tokens': 0, 'time': time.time() - 30}, 120)
+        self.assertTrue(acquire_token('read', wait=0))
+        self.assertFalse(acquire_token('read', wait=0))
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @override_settings(EOL_TIMIFY_RATE_LIMITS={'read': (0, 60)})
+    @override_settings(EOL_TIMIFY_RATE_LIMIT_WAIT=0)
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_student_user_view_rate_limited(self, get, post):
+        """
+            Test student view when there are no tokens to call quilgo
+        """
+        self.xblock.idform = "11223344"
+        self.xblock.xmodule_runtime.user_is_staff = False
+        self.xblock.scope_ids.user_id = self.student.id
+
+        response = self.load_student_view()
+        self.assertTrue('id="retry"' in response.content)
+        self.assertFalse(get.called)
+        self.assertFalse(post.called)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('eoltimify.forms.start_refresh')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_get_idform_cached(self, get, post, start_refresh):
+        """
+            Test the forms are downloaded once and refreshed in background when stale
+        """
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+                               200, json.dumps({"session": {"api_token": "test_token"}})),
+                           namedtuple("Request", ["status_code", "text"])(
+                               200, json.dumps({"pages": [{"id": 1, "label": "Test"}]}))]
+        post.side_effect = [namedtuple("Request", ["status_code", "headers"])(
+            200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'})]
+        forms = [{"display_name": "Test", "value": "1"}]
+        self.assertEqual(self.xblock.get_idform(), forms)
+        self.assertEqual(self.xblock.get_idform(), forms)
+        self.assertFalse(start_refresh.called)
+        with override_settings(EOL_TIMIFY_FORMS_CACHE=-1):
+            self.assertEqual(self.xblock.get_idform(), forms)
+        self.assertTrue(start_refresh.called)
+        self.assertEqual(get.call_count, 2)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @override_settings(EOL_TIMIFY_FORMS_WAIT=0.2)
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_get_idform_download_in_progress(self, get, post):
+        """
+            Test a worker doesn't download the forms while other worker is downloading them
+        """
+        from .forms import forms_key
+        cache.add(forms_key() + "-lock", True, 30)
+        self.assertEqual(self.xblock.get_idform(), [])
+        self.assertFalse(get.called)
+        self.assertFalse(post.called)
+        cache.delete(forms_key() + "-lock")
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_refresh_idform(self, get, post):
+        """
+            Test the forms can be downloaded again from Studio
+        """
+        request = TestRequest()
+        request.method = 'POST'
+        request.body = b'{}'
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+                               200, json.dumps({"session": {"api_token": "test_token"}})),
+                           namedtuple("Request", ["status_code", "text"])(
+                               200, json.dumps({"pages": [{"id": 1, "label": "Test"}]}))]
+        post.side_effect = [namedtuple("Request", ["status_code", "headers"])(
+            200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'})]
+        response = self.xblock.refresh_idform(request)
+        data = json.loads(response._app_iter[0].decode())
+        self.assertEqual(data, {'result': 'success', 'forms': [{"display_name": "Test", "value": "1"}]})
+
+    @patch('pkg_resources.resource_string')
+    def test_render_template_cached(self, resource_string):
+        """
+            Test templates are compiled once by process
+        """
+        from . import eoltimify
+        resource_string.return_value = b'<p>{{ value }}</p>'
+        with patch.dict(eoltimify._resources, clear=True), patch.dict(eoltimify._templates, clear=True):
+            self.assertEqual(self.xblock.render_template('static/html/test.html', {'value': 1}), '<p>1</p>')
+            self.assertEqual(self.xblock.render_template('static/html/test.html', {'value': 2}), '<p>2</p>')
+            self.assertEqual(resource_string.call_count, 1)
+            with override_settings(DEBUG=True):
+                self.xblock.render_template('static/html/test.html', {'value': 3})
+            self.assertEqual(resource_string.call_count, 2)
+
+    @override_settings(EOL_TIMIFY_WEBHOOK_SECRET="secret")
+    @override_settings(EOL_TIMIFY_WEBHOOK_GRADES=False)
+    def test_webhook(self):
+        """
+            Test the webhook updates the state of the owner of the link
+        """
+        from dateutil.parser import parse
+        from .links import link_index_key, read_link_index, write_link_index
+        from .models import EolTimifyLink
+        from .views import webhook
+        block = ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            idform='11223344',
+            due=parse("2020-05-11T15:00:00.000Z"))
+        self.create_link_row(self.student, "1", usage_key=block.location)
+        write_link_index(link_index_key("11223344"), {"1": {"finishedAt": None, "score": None}}, 30)
+        body = json.dumps({"id": 1, "finishedAt": "2020-05-11T15:37:55.000Z", "score": 5})
+
+        request = RequestFactory().post('/eoltimify/webhook', body, content_type='application/json')
+        response = webhook(request)
+        self.assertEqual(response.status_code, 403)
+
+        request = RequestFactory().post('/eoltimify/webhook', body, content_type='application/json', HTTP_X_EOLTIMIFY_TOKEN='secret')
+        response = webhook(request)
+        self.assertEqual(response.status_code, 200)
+        row = EolTimifyLink.objects.get(id_link="1")
+        self.assertEqual(row.score, '5')
+        self.assertEqual(row.finished_at.isoformat(), "2020-05-11T15:37:55+00:00")
+        self.assertTrue(row.done)
+        self.assertTrue(row.late)
+        self.assertEqual(read_link_index(link_index_key("11223344"))["1"]["score"], 5)
+
+    @override_settings(EOL_TIMIFY_WEBHOOK_SECRET="secret")
+    @override_settings(EOL_TIMIFY_WEBHOOK_GRADES=False)
+    def test_webhook_score_only(self):
+        """
+            Test a notification without finishedAt keeps the finished date of the link
+        """
+        from .models import EolTimifyLink
+        from .views import webhook
+        block = ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            idform='11223344')
+        self.create_link_row(self.student, "1", score="3", finished_at="2020-05-11T15:37:55.000Z",
+                             done=True, usage_key=block.location)
+        request = RequestFactory().post(
+            '/eoltimify/webhook',
+            json.dumps({"id": 1, "score": 6}),
+            content_type='application/json',
+            HTTP_X_EOLTIMIFY_TOKEN='secret')
+        response = webhook(request)
+        self.assertEqual(response.status_code, 200)
+        row = EolTimifyLink.objects.get(id_link="1")
+        self.assertEqual(row.score, '6')
+        self.assertTrue(row.done)
+        self.assertEqual(row.finished_at.isoformat(), "2020-05-11T15:37:55+00:00")
+
+    @override_settings(EOL_TIMIFY_WEBHOOK_SECRET="secret")
+    def test_webhook_deleted_block(self):
+        """
+            Test the webhook of a link of a deleted block is accepted and ignored
+        """
+        from opaque_keys.edx.keys import UsageKey
+        from .views import webhook
+        usage_key = UsageKey.from_string("block-v1:foo+baz+bar+type@eoltimify+block@deleted")
+        self.create_link_row(self.student, "1", usage_key=usage_key)
+        request = RequestFactory().post(
+            '/eoltimify/webhook',
+            json.dumps({"id": 1, "finishedAt": "2020-05-11T15:37:55.000Z", "score": 5}),
+            content_type='application/json',
+            HTTP_X_EOLTIMIFY_TOKEN='secret')
+        response = webhook(request)
+        self.assertEqual(response.status_code, 202)
+
+    @override_settings(EOL_TIMIFY_WEBHOOK_SECRET="secret")
+    def test_webhook_unknown_link(self):
+        """
+            Test the webhook of a link without owner
+        """
+        from .views import webhook
+        request = RequestFactory().post(
+            '/eoltimify/webhook',
+            json.dumps({"id": 10, "finishedAt": None, "score": None}),
+            content_type='application/json',
+            HTTP_X_EOLTIMIFY_TOKEN='secret')
+        response = webhook(request)
+        self.assertEqual(response.status_code, 202)
+
+    def test_backfill_links(self):
+        """
+            Test the state saved in the StudentModules is copied once
+        """
+        from django.core.management import call_command
+        from lms.djangoapps.courseware.models import StudentModule
+        from .models import EolTimifyLink
+        StudentModule.objects.create(
+            module_state_key=self.xblock.location,
+            student_id=self.student.id,
+            course_id=self.course.id,
+            module_type='eoltimify',
+            state='{"id_link": "1", "score": "5", "link": "testhash", "name_link": "test", "id_form": "11223344", "expired": "2020-05-11T15:37:55.000Z"}')
+        StudentModule.objects.create(
+            module_state_key=self.xblock.location,
+            student_id=self.staff_user.id,
+            course_id=self.course.id,
+            module_type='eoltimify',
+            state='{}')
+
+        call_command('eoltimify_backfill_links', str(self.course.id), '--batch-size', '1')
+        call_command('eoltimify_backfill_links')
+
+        row = EolTimifyLink.objects.get()
+        self.assertEqual((row.user_id, row.id_link, row.hash, row.label, row.score), (self.student.id, "1", "testhash", "test", "5"))
+        self.assertEqual(row.finished_at.year, 2020)
+        self.assertTrue(row.done)
+
+    @override_settings(EOL_TIMIFY_METRICS="memory")
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_metrics_memory(self, get, post):
+        """
+            Test the latency and status of quilgo and the token cache hits are recorded
+        """
+        from .auth import get_api_token
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+            200, json.dumps({"session": {"api_token": "test_token"}}))]
+        post.side_effect = [namedtuple("Request", ["status_code", "headers"])(
+            200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'})]
+        get_api_token()
+        get_api_token()
+        reset_api_token()
+        get_api_token()
+
+        collector = get_metrics()
+        self.assertEqual(collector.counters["quilgo.auth_ep.status.200"], 1)
+        self.assertEqual(collector.counters["quilgo.session.status.200"], 1)
+        self.assertEqual(len(collector.timings["quilgo.session.latency"]), 1)
+        self.assertEqual(collector.hit_ratio("cache.token"), 2.0 / 3)
+
+    def test_metrics_statsd(self):
+        """
+            Test the statsd backend sends the metrics to a local collector
+        """
+        import socket
+        collector = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        collector.bind(("127.0.0.1", 0))
+        collector.settimeout(2)
+        self.addCleanup(collector.close)
+        with override_settings(
+                EOL_TIMIFY_METRICS="statsd",
+                EOL_TIMIFY_STATSD_HOST="127.0.0.1",
+                EOL_TIMIFY_STATSD_PORT=collector.getsockname()[1]):
+            reset_metrics()
+            get_metrics().incr("cache.links.hit")
+            get_metrics().timing("quilgo.link.latency", 12.4)
+            get_metrics().gauge("show_score.rows", 3)
+        self.assertEqual(collector.recv(512), b"eoltimify.cache.links.hit:1|c")
+        self.assertEqual(collector.recv(512), b"eoltimify.quilgo.link.latency:12|ms")
+        self.assertEqual(collector.recv(512), b"eoltimify.show_score.rows:3|g")
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_student_view_deferred(self, get, post):
+        """
+            Test the student view doesn't call quilgo, the link is loaded by student_status
+        """
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+            200, json.dumps({"session": {"api_token": "test_token"}}))]
+        post.side_effect = [
+            namedtuple("Request", ["status_code", "headers"])(
+                200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'}),
+            namedtuple("Request", ["status_code", "text"])(
+                200, json.dumps({"links": [{"id": 1, "hash": "testhash", "label": "test"}]}))]
+        self.xblock.idform = "11223344"
+        self.xblock.xmodule_runtime.user_is_staff = False
+        self.xblock.scope_ids.user_id = self.student.id
+
+        response = self.xblock.student_view()
+        self.assertTrue('data-pending="true"' in response.content)
+        self.assertFalse(get.called)
+        self.assertFalse(post.called)
+
+        request = TestRequest()
+        request.method = 'POST'
+        request.body = b'{}'
+        data = json.loads(self.xblock.student_status(request)._app_iter[0].decode())
+        self.assertEqual(data['result'], 'success')
+        self.assertEqual(data['link'], 'https://quilgo.com/link/testhash')
+        self.assertFalse(data['done'])
+        self.assertTrue('href=https://quilgo.com/link/testhash ' in data['html'])
+
+    @override_settings(CELERY_ALWAYS_EAGER=False)
+    @patch('eoltimify.tasks.create_student_link.delay')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_student_status_provisioning(self, get, post, delay):
+        """
+            Test the link is created by a task queued once while it's provisioning
+        """
+        self.xblock.idform = "11223344"
+        self.xblock.xmodule_runtime.user_is_staff = False
+        self.xblock.scope_ids.user_id = self.student.id
+        request = TestRequest()
+        request.method = 'POST'
+        request.body = b'{}'
+
+        data = json.loads(self.xblock.student_status(request)._app_iter[0].decode())
+        self.assertTrue(data['provisioning'])
+        self.assertTrue('id="provisioning"' in data['html'])
+        data = json.loads(self.xblock.student_status(request)._app_iter[0].decode())
+        self.assertTrue(data['provisioning'])
+        delay.assert_called_once_with(self.xblock.block_id, self.student.id, "11223344")
+        self.assertFalse(get.called)
+        self.assertFalse(post.called)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_task_create_student_link(self, get, post):
+        """
+            Test the task creates the link of the student and releases the claim
+        """
+        from .links import claim_link_creation
+        from .models import EolTimifyLink
+        from .tasks import create_student_link
+        block = ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            idform='11223344')
+        get.side_effect = [namedtuple("Request", ["status_code", "text"])(
+            200, json.dumps({"session": {"api_token": "test_token"}}))]
+        post.side_effect = [
+            namedtuple("Request", ["status_code", "headers"])(
+                200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'}),
+            namedtuple("Request", ["status_code", "text"])(
+                200, json.dumps({"links": [{"id": 1, "hash": "testhash", "label": "student"}]}))]
+        claim_link_creation(str(block.location), self.student.id, "11223344")
+
+        create_student_link(str(block.location), self.student.id, "11223344")
+        create_student_link(str(block.location), self.student.id, "11223344")
+
+        row = EolTimifyLink.objects.get(usage_key=block.location, user=self.student)
+        self.assertEqual(row.id_link, "1")
+        self.assertEqual(post.call_count, 2)
+        self.assertTrue(claim_link_creation(str(block.location), self.student.id, "11223344"))
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @override_settings(EOL_TIMIFY_RATE_LIMITS={'read': (0, 60)})
+    @override_settings(EOL_TIMIFY_RATE_LIMIT_WAIT=0)
+    @patch('requests.Session.post')
+    def test_task_create_student_link_rate_limited(self, post):
+        """
+            Test the task releases the claim when there are no tokens to login
+        """
+        from .links import claim_link_creation
+        from .tasks import create_student_link
+        block = ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            idform='11223344')
+        claim_link_creation(str(block.location), self.student.id, "11223344")
+
+        create_student_link(str(block.location), self.student.id, "11223344")
+
+        self.assertFalse(post.called)
+        self.assertIsNone(block.get_form_link_row(self.student.id))
+        self.assertTrue(claim_link_creation(str(block.location), self.student.id, "11223344"))
+
+    @override_settings(EOL_TIMIFY_LINK_WAIT=1)
+    @patch('requests.Session.post')
+    def test_create_student_link_wait_winner(self, post):
+        """
+            Test a request waits for the link created by the request holding the lock
+        """
+        from .links import link_lock_key
+        self.xblock.idform = "11223344"
+        cache.add(link_lock_key(self.xblock.location, self.student.id), True)
+        self.create_link_row(self.student, "7")
+
+        row = self.xblock.create_student_link(self.student.id, "test", "test_token")
+        self.assertEqual(row.id_link, "7")
+        self.assertFalse(post.called)
+
+        cache.delete(link_lock_key(self.xblock.location, self.student.id))
+        self.xblock.idform = "55667788"
+        cache.add(link_lock_key(self.xblock.location, self.student.id), True)
+        self.assertIsNone(self.xblock.create_student_link(self.student.id, "test", "test_token"))
+        self.assertFalse(post.called)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('lms.djangoapps.courseware.module_render.get_module_for_descriptor',
+           side_effect=lambda user, request, descriptor, *args: descriptor)
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_batch_status(self, get, post, get_module):
+        """
+            Test the status of several blocks is resolved with one link list per form
+        """
+        from .views import batch_status
+        blocks = [ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            idform=idform) for idform in ['11223344', '11223344', '55667788']]
+        self.create_link_row(self.student, "1", usage_key=blocks[0].location)
+        self.create_link_row(self.student, "2", usage_key=blocks[1].location)
+        self.create_link_row(self.student, "3", score="4", finished_at="2020-05-11T15:37:55.000Z",
+                             id_form="55667788", done=True, usage_key=blocks[2].location)
+        get.side_effect = [
+            namedtuple("Request", ["status_code", "text"])(
+                200, json.dumps({"session": {"api_token": "test_token"}})),
+            namedtuple("Request", ["status_code", "text"])(200, json.dumps({"links": [
+                {"id": 1, "finishedAt": None, "score": None},
+                {"id": 2, "finishedAt": "2020-05-11T15:37:55.000Z", "score": 5}]}))]
+        post.side_effect = [namedtuple("Request", ["status_code", "headers"])(
+            200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'})]
+
+        request = RequestFactory().post(
+            '/eoltimify/status',
+            json.dumps({'usage_keys': [str(block.location) for block in blocks]}),
+            content_type='application/json')
+        request.user = self.student
+        response = batch_status(request)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content.decode())
+        self.assertEqual(get.call_count, 2)
+        status = [data['blocks'][str(block.location)] for block in blocks]
+        self.assertTrue(status[0]['timify'])
+        self.assertFalse(status[0]['done'])
+        self.assertTrue(status[1]['done'])
+        self.assertEqual(status[1]['score'], '5')
+        self.assertTrue(status[2]['done'])
+        self.assertEqual(status[2]['score'], '4')
+        self.assertEqual(get_module.call_count, 3)
+        self.assertEqual(get_module.call_args[0][0], self.student)
+
+        request = RequestFactory().post(
+            '/eoltimify/status', json.dumps({'usage_keys': ['invalid']}), content_type='application/json')
+        request.user = self.student
+        self.assertEqual(batch_status(request).status_code, 400)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('lms.djangoapps.courseware.module_render.get_module_for_descriptor',
+           side_effect=lambda user, request, descriptor, *args: descriptor)
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_batch_status_not_enrolled(self, get, post, get_module):
+        """
+            Test the links of students without enrollment are not created
+        """
+        from .models import EolTimifyLink
+        from .views import batch_status
+        with patch('student.models.cc.User.save'):
+            user = UserFactory(username='not_enrolled')
+        block = ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            idform='11223344')
+        request = RequestFactory().post(
+            '/eoltimify/status',
+            json.dumps({'usage_keys': [str(block.location)]}),
+            content_type='application/json')
+        request.user = user
+        data = json.loads(batch_status(request).content.decode())
+        self.assertFalse(data['blocks'][str(block.location)]['provisioning'])
+        self.assertFalse(data['blocks'][str(block.location)]['timify'])
+        self.assertFalse(EolTimifyLink.objects.filter(user=user).exists())
+        self.assertFalse(get.called)
+        self.assertFalse(post.called)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @override_settings(EOL_TIMIFY_RATE_LIMITS={'read': (0, 60)})
+    @patch('lms.djangoapps.courseware.module_render.get_module_for_descriptor',
+           side_effect=lambda user, request, descriptor, *args: descriptor)
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_batch_status_rate_limited(self, get, post, get_module):
+        """
+            Test the links are shown when quilgo can't be called to login
+        """
+        from .views import batch_status
+        block = ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            idform='11223344')
+        self.create_link_row(self.student, "1", usage_key=block.location)
+        request = RequestFactory().post(
+            '/eoltimify/status',
+            json.dumps({'usage_keys': [str(block.location)]}),
+            content_type='application/json')
+        request.user = self.student
+        response = batch_status(request)
+        self.assertEqual(response.status_code, 200)
+        status = json.loads(response.content.decode())['blocks'][str(block.location)]
+        self.assertTrue(status['timify'])
+        self.assertFalse(status['done'])
+        self.assertFalse(post.called)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_course_results(self, get, post):
+        """
+            Test the course dashboard shows the score of each student in each block
+        """
+        from .views import course_results
+        blocks = [ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            display_name=name,
+            idform=idform) for name, idform in [('Test 1', '11223344'), ('Test 2', '55667788')]]
+        self.create_link_row(self.student, "1", usage_key=blocks[0].location)
+        self.create_link_row(self.student, "2", score="3", id_form="55667788", usage_key=blocks[1].location)
+        links = {
+            '11223344': [{"id": 1, "finishedAt": "2020-05-11T15:37:55.000Z", "score": 5}],
+            '55667788': [{"id": 2, "finishedAt": None, "score": None}]}
+
+        def quilgo_get(url, params=None, **kwargs):
+            if params is None:
+                return namedtuple("Request", ["status_code", "text"])(
+                    200, json.dumps({"session": {"api_token": "test_token"}}))
+            return namedtuple("Request", ["status_code", "text"])(
+                200, json.dumps({"links": links[str(params['formId'])]}))
+        get.side_effect = quilgo_get
+        post.side_effect = [namedtuple("Request", ["status_code", "headers"])(
+            200, {'Set-Cookie': 'Domain=quilgo.com; Path=/, connect.sid=test;'})]
+
+        request = RequestFactory().get('/eoltimify/results/{}'.format(self.course.id))
+        request.user = self.student
+        response = course_results(request, str(self.course.id))
+        self.assertEqual(response.status_code, 403)
+
+        request.user = self.staff_user
+        response = course_results(request, str(self.course.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get.call_count, 3)
+        content = response.content.decode()
+        self.assertIn('Test 1', content)
+        self.assertIn('Test 2', content)
+        self.assertIn('<td>student</td>', content)
+        self.assertIn('<td>5</td><td>3</td>', content)
+        self.assertIn('<td>staff_user</td>', content)
+        self.assertNotIn('No se pudieron obtener', content)
+
+    @override_settings(TIMIFY_USER="test")
+    @override_settings(TIMIFY_PASSWORD="test")
+    @override_settings(EOL_TIMIFY_RATE_LIMITS={'read': (0, 60)})
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_course_results_rate_limited(self, get, post):
+        """
+            Test the course dashboard shows the saved scores when quilgo can't be called
+        """
+        from .views import course_results
+        block = ItemFactory.create(
+            parent_location=self.course.location,
+            category='eoltimify',
+            display_name='Test 1',
+            idform='11223344')
+        self.create_link_row(self.student, "1", score="3", usage_key=block.location)
+        request = RequestFactory().get('/eoltimify/results/{}'.format(self.course.id))
+        request.user = self.staff_user
+        response = course_results(request, str(self.course.id))
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn('No se pudieron obtener', content)
+        self.assertIn('<td>3</td>', content)
+        self.assertFalse(post.called)
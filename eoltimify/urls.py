@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.conf.urls import url
+
+from .views import webhook, batch_status, course_results, export_csv
+
+urlpatterns = [
+    url(r'^webhook/?$', webhook, name='webhook'),
+    url(r'^status/?$', batch_status, name='batch_status'),
+    url(r'^results/{}/?$'.format(settings.COURSE_ID_PATTERN), course_results, name='course_results'),
+    url(r'^csv/{}/?$'.format(settings.USAGE_KEY_PATTERN), export_csv, name='export_csv'),
+]
@@ -0,0 +1,69 @@
+"""
+Helpers shared by the eoltimify modules
+"""
+import time
+import logging
+
+from django.core.cache import cache
+
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+WAIT_STEP = 0.1
+
+
+def wait_lock(fetch, lock_key, wait):
+    """
+        Wait until fetch() returns the result of the worker holding lock_key,
+        return None if it doesn't happen in 'wait' seconds.
+    """
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        time.sleep(WAIT_STEP)
+        data = fetch()
+        if data is not None:
+            return data
+        if cache.get(lock_key) is None:
+            # the winner failed, nothing to wait for
+            break
+    return None
+
+
+def wait_cache(key, lock_key, wait, read=None):
+    """
+        Wait until the worker holding lock_key saves key in the cache,
+        return None if it doesn't happen in 'wait' seconds.
+    """
+    read = read or cache.get
+    return wait_lock(lambda: read(key), lock_key, wait)
+
+
+def cache_single_flight(key, compute, timeout, lock_timeout, wait, metric=None, read=None, write=None):
+    """
+        Return the cached value of key, if it's missing only one worker
+        runs compute() and saves its result, the others wait for it.
+        compute() must return None on error, errors are not cached.
+        With metric the hits and misses are counted as metric.hit/metric.miss.
+        read(key) and write(key, data, timeout) replace cache.get and cache.set
+        for values stored in more than one key.
+    """
+    read = read or cache.get
+    write = write or cache.set
+    data = read(key)
+    if metric is not None:
+        metrics.incr(metric + (".hit" if data is not None else ".miss"))
+    if data is not None:
+        return data
+    lock_key = key + "-lock"
+    if cache.add(lock_key, True, lock_timeout):
+        try:
+            data = read(key)
+            if data is None:
+                data = compute()
+                if data is not None:
+                    write(key, data, timeout)
+        finally:
+            cache.delete(lock_key)
+        return data
+    return wait_cache(key, lock_key, wait, read)
@@ -0,0 +1,186 @@
+"""
+Views of eoltimify
+"""
+import csv
+import hmac
+import json
+import logging
+
+from django.conf import settings as DJANGO_SETTINGS
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from xblockutils.resources import ResourceLoader
+
+from .links import get_link_row, set_link_result, update_link_index
+from .results import get_course_results
+from .status import get_blocks_status
+
+log = logging.getLogger(__name__)
+loader = ResourceLoader(__name__)
+
+
+def is_valid_token(request):
+    """
+        Verify the X-Eoltimify-Token header of the webhook
+    """
+    secret = DJANGO_SETTINGS.EOL_TIMIFY_WEBHOOK_SECRET
+    token = request.META.get('HTTP_X_EOLTIMIFY_TOKEN', '')
+    return secret != "" and hmac.compare_digest(token.encode('utf-8'), secret.encode('utf-8'))
+
+
+@csrf_exempt
+@require_POST
+def webhook(request):
+    """
+        Receive the finished date and score of a quilgo link:
+        {"id": id_link, "finishedAt": "2020-05-11T15:37:55.000Z", "score": 5}
+        The student of the link is found in the EolTimifyLink index.
+    """
+    from xmodule.modulestore.django import modulestore
+    from xmodule.modulestore.exceptions import ItemNotFoundError
+    if not is_valid_token(request):
+        return HttpResponseForbidden()
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+        id_link = str(data['id'])
+    except (ValueError, KeyError, TypeError):
+        return HttpResponseBadRequest()
+
+    row = get_link_row(id_link)
+    if row is None:
+        log.warning("Webhook of link without owner, id_link: {}".format(id_link))
+        return JsonResponse({'result': 'unknown'}, status=202)
+
+    try:
+        block = modulestore().get_item(row.usage_key)
+    except ItemNotFoundError:
+        log.warning("Webhook of link of a deleted block, id_link: {}, block: {}".format(id_link, row.usage_key))
+        return JsonResponse({'result': 'unknown'}, status=202)
+    if 'finishedAt' in data:
+        finished_at = data['finishedAt']
+    else:
+        # a notification of the score only keeps the finished date
+        finished_at = row.finished_at.isoformat() if row.finished_at is not None else None
+    score = data.get('score')
+    set_link_result(row, finished_at, score, block.expired_date())
+    row.save()
+    if DJANGO_SETTINGS.EOL_TIMIFY_WEBHOOK_GRADES:
+        grade = block.get_grade(row.score)
+        if grade is not None and row.published_score != grade:
+            block.publish_grades([(row.user_id, grade)])
+    update_link_index(row.id_form, id_link, finished_at, score)
+    return JsonResponse({'result': 'success'})
+
+
+def get_student_blocks(request, usage_keys):
+    """
+        Return the eoltimify blocks of the usage keys bound to the current user,
+        as the LMS does for the handlers (due date extensions, CCX overrides
+        and access), without the blocks shown to staff
+    """
+    from lms.djangoapps.courseware.model_data import FieldDataCache
+    from lms.djangoapps.courseware.module_render import get_module_for_descriptor
+    from xmodule.modulestore.django import modulestore
+    from xmodule.modulestore.exceptions import ItemNotFoundError
+    descriptors = {}
+    for usage_key in usage_keys:
+        try:
+            descriptor = modulestore().get_item(usage_key)
+        except ItemNotFoundError:
+            continue
+        if descriptor.category == 'eoltimify':
+            descriptors.setdefault(usage_key.course_key, []).append(descriptor)
+    blocks = []
+    for course_key, course_descriptors in descriptors.items():
+        field_data_cache = FieldDataCache(course_descriptors, course_key, request.user)
+        for descriptor in course_descriptors:
+            block = get_module_for_descriptor(
+                request.user, request, descriptor, field_data_cache, course_key)
+            if block is not None and not block.show_staff_grading_interface():
+                blocks.append(block)
+    return blocks
+
+
+@login_required
+@require_POST
+def batch_status(request):
+    """
+        Return the status of the current user in several eoltimify blocks:
+        {"usage_keys": ["block-v1:...", ...]}
+        The links of the student are loaded in one query and quilgo is
+        called once per distinct form.
+    """
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+        usage_keys = [UsageKey.from_string(key) for key in data['usage_keys']]
+    except (ValueError, KeyError, TypeError, InvalidKeyError):
+        return HttpResponseBadRequest()
+    if len(usage_keys) > DJANGO_SETTINGS.EOL_TIMIFY_BATCH_MAX:
+        return HttpResponseBadRequest()
+    blocks = get_student_blocks(request, usage_keys)
+    return JsonResponse({
+        'result': 'success',
+        'blocks': get_blocks_status(request.user.id, blocks)})
+
+
+@login_required
+@require_GET
+def course_results(request, course_id):
+    """
+        Show the score of every student in every eoltimify block of the course
+    """
+    from lms.djangoapps.courseware.access import has_access
+    try:
+        course_key = CourseKey.from_string(course_id)
+    except InvalidKeyError:
+        return HttpResponseBadRequest()
+    if not has_access(request.user, 'staff', course_key):
+        return HttpResponseForbidden()
+    context = get_course_results(course_key, request.user.id)
+    context['course_id'] = course_id
+    return HttpResponse(loader.render_django_template('static/html/eoltimify_results.html', context))
+
+
+class Echo(object):
+    # pylint: disable=too-few-public-methods
+    """
+    File-like object that returns the written value, used to stream csv rows
+    """
+
+    def write(self, value):
+        return value
+
+
+@login_required
+@require_GET
+def export_csv(request, usage_key_string):
+    """
+        Download the score of the students of an eoltimify block as csv,
+        the response is streamed by chunks of EOL_TIMIFY_DB_BATCH_SIZE students
+    """
+    from lms.djangoapps.courseware.access import has_access
+    from xmodule.modulestore.django import modulestore
+    from xmodule.modulestore.exceptions import ItemNotFoundError
+    try:
+        usage_key = UsageKey.from_string(usage_key_string)
+    except InvalidKeyError:
+        return HttpResponseBadRequest()
+    if not has_access(request.user, 'staff', usage_key.course_key):
+        return HttpResponseForbidden()
+    try:
+        block = modulestore().get_item(usage_key)
+    except ItemNotFoundError:
+        raise Http404
+    if block.category != 'eoltimify':
+        raise Http404
+
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in block.iter_csv_rows()),
+        content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="eoltimify_{}.csv"'.format(usage_key.block_id)
+    return response